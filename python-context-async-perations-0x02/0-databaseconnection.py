@@ -1,28 +1,136 @@
 #!/usr/bin/env python3
 
+import asyncio
+import contextvars
+import queue
 import sqlite3
+import threading
+
+# db_name -> _Frame of the connection the current thread or task is using
+_active = contextvars.ContextVar("active_connections", default={})
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _owner():
+    """Identify the current thread and, inside an event loop, the task"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return threading.get_ident(), id(task) if task is not None else None
+
+
+class _Frame:
+    def __init__(self, connection, owner):
+        self.connection = connection
+        self.owner = owner
+        self.depth = 0
+
+
+class ConnectionPool:
+    """Idle connections to one database, reused across DatabaseConnection blocks"""
+
+    def __init__(self, db_name, max_idle=8):
+        self.db_name = db_name
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            # transactions are managed explicitly with BEGIN/SAVEPOINT
+            return sqlite3.connect(
+                self.db_name, isolation_level=None, check_same_thread=False
+            )
+
+    def release(self, connection):
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+def _discard(pool, connection):
+    """Return ``connection`` to the pool only if no transaction is left open"""
+    try:
+        if connection.in_transaction:
+            connection.rollback()
+    except sqlite3.Error:
+        pass
+    if connection.in_transaction:
+        connection.close()
+    else:
+        pool.release(connection)
+
+
+def get_pool(db_name):
+    with _pools_lock:
+        if db_name not in _pools:
+            _pools[db_name] = ConnectionPool(db_name)
+        return _pools[db_name]
 
 
 class DatabaseConnection:
-    """A simple database connection context manager."""
+    """A reentrant, pooled database connection context manager.
+
+    The outermost block in a thread or task borrows a pooled connection
+    and opens a transaction; blocks nested inside it reuse that
+    connection and run in a SAVEPOINT. Leaving a block with an exception
+    rolls back just that block's work, and only the outermost block
+    commits.
+    """
 
     def __init__(self, db_name):
         self.db_name = db_name
         self.connection = None
         self.cursor = None
+        self._entries = []
 
     def __enter__(self):
-        # open connection
-        self.connection = sqlite3.connect(self.db_name)
+        active = _active.get()
+        frame = active.get(self.db_name)
+        owner = _owner()
+        if frame is not None and frame.owner == owner:
+            savepoint = f"sp_{frame.depth + 1}"
+            frame.connection.execute(f"SAVEPOINT {savepoint}")
+            frame.depth += 1
+            self._entries.append((frame, savepoint, None))
+        else:
+            pool = get_pool(self.db_name)
+            connection = pool.acquire()
+            try:
+                connection.execute("BEGIN")
+            except BaseException:
+                _discard(pool, connection)
+                raise
+            frame = _Frame(connection, owner)
+            token = _active.set({**active, self.db_name: frame})
+            self._entries.append((frame, None, token))
+        self.connection = frame.connection
         self.cursor = self.connection.cursor()
-        print("Connection established.", self.db_name)
         return self.cursor
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.connection:
-            self.connection.commit()
-            self.connection.close()
-            print("Connection closed.")
+        frame, savepoint, token = self._entries.pop()
+        connection = frame.connection
+        if savepoint is not None:
+            if exc_type:
+                connection.execute(f"ROLLBACK TO {savepoint}")
+            connection.execute(f"RELEASE {savepoint}")
+            frame.depth -= 1
+        else:
+            pool = get_pool(self.db_name)
+            _active.reset(token)
+            try:
+                if exc_type:
+                    connection.rollback()
+                else:
+                    connection.commit()
+            except BaseException:
+                _discard(pool, connection)
+                raise
+            pool.release(connection)
         if exc_type:
             print(f"An error occurred: {exc_value}")
         return False  # Propagate exception if any
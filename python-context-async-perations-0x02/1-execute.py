@@ -1,11 +1,64 @@
 #!/usr/bin/env python3
+import functools
 import sqlite3
+from collections import namedtuple
+
+
+@functools.lru_cache(maxsize=64)
+def _namedtuple_class(fields):
+    return namedtuple("Row", fields, rename=True)
+
+
+def namedtuple_row(cursor, row):
+    """sqlite3 row factory returning a namedtuple per row"""
+    return _namedtuple_class(tuple(column[0] for column in cursor.description))(*row)
+
+
+@functools.lru_cache(maxsize=64)
+def _record_class(fields):
+    def __init__(self, *values):
+        for field, value in zip(fields, values):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        pairs = ", ".join(f"{field}={getattr(self, field)!r}" for field in fields)
+        return f"Record({pairs})"
+
+    return type(
+        "Record", (), {"__slots__": fields, "__init__": __init__, "__repr__": __repr__}
+    )
+
+
+def record_row(cursor, row):
+    """sqlite3 row factory returning a compact ``__slots__`` record per row
+
+    Column names are renamed the way ``namedtuple(rename=True)`` does, so
+    ``COUNT(*)`` becomes ``_0`` and a repeated ``id`` becomes ``_1``.
+    """
+    names = tuple(column[0] for column in cursor.description)
+    fields = _namedtuple_class(names)._fields
+    return _record_class(fields)(*row)
+
 
 class ExecuteQuery:
-    def __init__(self, db_name, query, params=None):
+    """Run a query and hand its results to the ``with`` block
+
+    By default the block gets a list of every row. With ``stream=True``
+    it gets a lazy iterator that reads ``chunk_size`` rows at a time, so
+    memory is bounded by one chunk; the connection stays open until the
+    block exits. ``row_factory`` is an sqlite3 row factory such as
+    ``namedtuple_row``, ``record_row`` or ``sqlite3.Row``.
+    """
+
+    def __init__(
+        self, db_name, query, params=None, stream=False, chunk_size=500, row_factory=None
+    ):
         self.db_name = db_name
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.row_factory = row_factory
         self.conn = None
         self.cursor = None
         self.results = None
@@ -13,11 +66,23 @@ class ExecuteQuery:
     def __enter__(self):
         # Open connection and execute query
         self.conn = sqlite3.connect(self.db_name)
+        if self.row_factory is not None:
+            self.conn.row_factory = self.row_factory
         self.cursor = self.conn.cursor()
         self.cursor.execute(self.query, self.params)
-        self.results = self.cursor.fetchall()
+        if self.stream:
+            self.results = self._iter_rows()
+        else:
+            self.results = self.cursor.fetchall()
         return self.results  # Return results directly
 
+    def _iter_rows(self):
+        while True:
+            rows = self.cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            yield from rows
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         # Commit (if needed) and close connection
         if self.conn:
@@ -31,7 +96,13 @@ if __name__ == "__main__":
     query = "SELECT * FROM users WHERE age > ?"
     params = (25,)
 
-    with ExecuteQuery("../python-decorators-0x01/test_users.db", query, params) as results:
+    with ExecuteQuery(
+        "../python-decorators-0x01/test_users.db",
+        query,
+        params,
+        stream=True,
+        row_factory=namedtuple_row,
+    ) as results:
         print("Query Results:")
         for row in results:
             print(row)
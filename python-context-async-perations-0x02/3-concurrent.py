@@ -1,29 +1,174 @@
 #!/usr/bin/env python3
 import asyncio
+import re
+from contextlib import asynccontextmanager
+
 import aiosqlite
 
 DB_NAME = "../python-decorators-0x01/test_users.db"
+POOL_SIZE = 5
+WHITESPACE = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`|\s+""")
+
+_pools = {}
+
+class AsyncConnectionPool:
+    """A small set of aiosqlite connections shared by coroutines.
+
+    Every aiosqlite connection runs its own background thread, so opening
+    one per query costs a thread start and a file open each time. The
+    pool opens at most ``size`` connections lazily and hands idle ones
+    back out; acquire() waits while all of them are in use.
+    """
+
+    def __init__(self, db_name=DB_NAME, size=POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+        self._closed = False
+
+    async def acquire(self):
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        await self._slots.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await aiosqlite.connect(self.db_name)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, db, discard=False):
+        if discard or self._closed:
+            await db.close()
+        else:
+            self._idle.append(db)
+        self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a connection for the block"""
+        db = await self.acquire()
+        try:
+            yield db
+        except BaseException:
+            # don't hand a connection with an open transaction to the next caller
+            await self.release(db, discard=db.in_transaction)
+            raise
+        await self.release(db)
+
+    async def fetchall(self, query, params=()):
+        """Run ``query`` on a pooled connection and return every row"""
+        async with self.connection() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
+    async def close(self):
+        self._closed = True
+        while self._idle:
+            await self._idle.pop().close()
+
+async def get_pool(db_name=DB_NAME, size=POOL_SIZE):
+    """Return the shared pool for ``db_name``, creating it on first use"""
+    if db_name not in _pools:
+        _pools[db_name] = AsyncConnectionPool(db_name, size)
+    return _pools[db_name]
+
+async def close_pool(db_name=DB_NAME):
+    """Close the shared pool for ``db_name``"""
+    pool = _pools.pop(db_name, None)
+    if pool is not None:
+        await pool.close()
+
+async def fan_out(queries, max_concurrency=None, pool=None):
+    """Run many queries concurrently and return their rows in order.
+
+    ``queries`` holds SQL strings or ``(sql, params)`` pairs. At most
+    ``max_concurrency`` run at once, never more than the pool size, and
+    only that many tasks are created however many queries there are. If
+    a query fails the rest are cancelled and its exception is raised.
+    """
+    pool = pool or await get_pool()
+    workers = min(max_concurrency or pool.size, pool.size)
+    queries = [(q, ()) if isinstance(q, str) else q for q in queries]
+    results = [None] * len(queries)
+    pending = iter(range(len(queries)))
+
+    async def worker():
+        async with pool.connection() as db:
+            for i in pending:
+                query, params = queries[i]
+                async with db.execute(query, params) as cursor:
+                    results[i] = await cursor.fetchall()
+
+    try:
+        # the first failing query cancels the other workers
+        async with asyncio.TaskGroup() as group:
+            for _ in range(min(workers, len(queries))):
+                group.create_task(worker())
+    except BaseExceptionGroup as errors:
+        raise errors.exceptions[0]
+    return results
+
+class AsyncSingleFlight:
+    """Coalesce concurrent identical coroutine calls into one execution.
+
+    The first caller for a key starts the call as a task; callers asking
+    for the same key while it runs await that task and share its result
+    or exception. A caller being cancelled does not cancel the shared
+    task, and the key is forgotten as soon as the task finishes.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.stats = {"executions": 0, "shared": 0}
+
+    async def do(self, key, func, *args, **kwargs):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.stats["executions"] += 1
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+query_flight = AsyncSingleFlight()
+
+def normalize(query):
+    """Collapse whitespace outside quotes and drop the trailing semicolon
+
+    Keep in step with query_cache.normalize; both test suites pin the
+    same cases.
+    """
+    query = WHITESPACE.sub(lambda m: " " if m.group().isspace() else m.group(), query)
+    return query.strip().rstrip(";").rstrip()
+
+async def fetch_shared(query, params=(), pool=None):
+    """Fetch every row of ``query``, sharing an identical query in flight"""
+    pool = pool or await get_pool()
+    key = (pool.db_name, normalize(query), tuple(params))
+    return await query_flight.do(key, pool.fetchall, query, params)
 
 async def async_fetch_users():
     """Fetch all users from the users table."""
-    async with aiosqlite.connect(DB_NAME) as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            rows = await cursor.fetchall()
-            return rows
+    return await fetch_shared("SELECT * FROM users")
 
 async def async_fetch_older_users():
     """Fetch users older than 40 from the users table."""
-    async with aiosqlite.connect(DB_NAME) as db:
-        async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
-            rows = await cursor.fetchall()
-            return rows
+    return await fetch_shared("SELECT * FROM users WHERE age > 40")
 
 async def fetch_concurrently():
     """Run both queries concurrently and print the results."""
-    all_users, older_users = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
-    )
+    try:
+        all_users, older_users = await asyncio.gather(
+            async_fetch_users(),
+            async_fetch_older_users()
+        )
+    finally:
+        await close_pool()
 
     print("All Users:")
     for row in all_users:
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Benchmark many small concurrent queries: connection per query vs pooled.
+
+    ./bench_concurrent.py [db_path] [queries] [pool_size]
+"""
+import asyncio
+import sys
+import time
+
+import aiosqlite
+
+concurrent = __import__("3-concurrent")
+
+QUERY = "SELECT * FROM users WHERE id = ?"
+
+
+async def connect_per_query(db_path, queries):
+    """The previous pattern: every coroutine opens its own connection"""
+
+    async def fetch(params):
+        async with aiosqlite.connect(db_path) as db:
+            async with db.execute(QUERY, params) as cursor:
+                return await cursor.fetchall()
+
+    return await asyncio.gather(*(fetch(params) for _, params in queries))
+
+
+async def pooled(db_path, queries, size):
+    pool = concurrent.AsyncConnectionPool(db_path, size)
+    try:
+        return await concurrent.fan_out(queries, pool=pool)
+    finally:
+        await pool.close()
+
+
+async def main(db_path, count, size):
+    queries = [(QUERY, (n % 1000 + 1,)) for n in range(count)]
+    print("variant\tqueries_per_s\tseconds")
+    for name, run in (
+        ("connect-per-query", lambda: connect_per_query(db_path, queries)),
+        (f"pooled({size})", lambda: pooled(db_path, queries, size)),
+    ):
+        start = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - start
+        print(f"{name}\t{count / elapsed:.0f}\t{elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            sys.argv[1] if len(sys.argv) > 1 else concurrent.DB_NAME,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+            int(sys.argv[3]) if len(sys.argv) > 3 else concurrent.POOL_SIZE,
+        )
+    )
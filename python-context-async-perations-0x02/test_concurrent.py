@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+  Unittests for the 3-concurrent module.
+"""
+import unittest
+
+concurrent = __import__("3-concurrent")
+
+# the same cases pin query_cache.normalize in python-decorators-0x01
+NORMALIZE_CASES = (
+    ("SELECT  *\n FROM users ;", "SELECT * FROM users"),
+    ("SELECT id  WHERE name = 'a  b'", "SELECT id WHERE name = 'a  b'"),
+    ("SELECT \"full  name\" FROM users", "SELECT \"full  name\" FROM users"),
+    ("SELECT 'it''s  here'\t;", "SELECT 'it''s  here'"),
+    ("SELECT `a  b`  FROM t", "SELECT `a  b` FROM t"),
+)
+
+
+class TestNormalize(unittest.TestCase):
+    """TestNormalize class to test normalize."""
+
+    def test_normalize(self):
+        """Test that whitespace collapses only outside quotes."""
+        for query, expected in NORMALIZE_CASES:
+            self.assertEqual(concurrent.normalize(query), expected, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
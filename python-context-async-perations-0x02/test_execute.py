@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+  Unittests for the 1-execute module.
+"""
+import sqlite3
+import unittest
+
+execute = __import__("1-execute")
+
+
+class TestRowFactories(unittest.TestCase):
+    """TestRowFactories class to test namedtuple_row and record_row."""
+
+    def setUp(self):
+        """Open an in-memory database with two joinable tables."""
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.executescript(
+            """
+            CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER);
+            INSERT INTO users VALUES (1, 'Ada');
+            INSERT INTO orders VALUES (7, 1);
+            """
+        )
+
+    def fetch(self, row_factory, query):
+        self.conn.row_factory = row_factory
+        return self.conn.execute(query).fetchone()
+
+    def test_record_row_computed_column(self):
+        """Test that a computed column gets a valid field name."""
+        row = self.fetch(execute.record_row, "SELECT COUNT(*), name FROM users")
+        self.assertEqual((row._0, row.name), (1, "Ada"))
+
+    def test_record_row_duplicate_columns(self):
+        """Test that repeated column names keep every value."""
+        row = self.fetch(
+            execute.record_row,
+            "SELECT users.id, orders.id FROM users JOIN orders ON user_id = users.id",
+        )
+        self.assertEqual((row.id, row._1), (1, 7))
+        self.assertEqual(repr(row), "Record(id=1, _1=7)")
+
+    def test_namedtuple_row_matches_record_row(self):
+        """Test that both factories name the same columns alike."""
+        query = "SELECT users.id, orders.id, COUNT(*) FROM users JOIN orders"
+        self.assertEqual(
+            self.fetch(execute.namedtuple_row, query)._fields,
+            type(self.fetch(execute.record_row, query)).__slots__,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,28 +1,19 @@
 #!/usr/bin/env python3
-import sqlite3
-import functools
-from datetime import datetime
+from db_pool import with_db_connection
+from profiler import profiler
 
-
-#### decorator to lof SQL queries
-def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query = kwargs.get("query", "") or (args[0] if args else "")
-        print(f"Executing SQL Query: {query}")
-        return func(*args, **kwargs)
-
-    return wrapper
+#### decorator to profile SQL queries; set QUERY_PROFILE=0 to disable and
+#### QUERY_EXPLAIN_THRESHOLD_MS to capture query plans of slow queries
+log_queries = profiler.profile
+profiler.report_at_exit()
 
 
+@with_db_connection(db_path="test_users.db")
 @log_queries
-def fetch_all_users(query):
-    conn = sqlite3.connect("test_users.db")
+def fetch_all_users(conn, query):
     cursor = conn.cursor()
     cursor.execute(query)
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return cursor.fetchall()
 
 
 #### fetch users while logging the query
@@ -1,47 +1,35 @@
 #!/usr/bin/env python3
-import sqlite3
-import functools
-
-
-def with_db_connection(func):
-    """
-    Decorator that opens a DB connection, passes it to the function,
-    and closes it afterwards.
-    """
-
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            conn = None
-            try:
-                # Open a database connection
-                conn = sqlite3.connect("users.db")
-                cursor = conn.cursor()
-                # pass the connection to the decorated function
-                result = func(*args, conn=conn, cursor=cursor, **kwargs)
-                conn.commit()  # Commit any changes if needed
-                return result
-            except Exception as e:
-                if conn:
-                    conn.rollback()
-                raise e
-            finally:
-                if conn:
-                    conn.close()
-
-        return wrapper
-
-    return decorator
+from dataloader import DataLoader
+from db_pool import prepare, with_db_connection
+
+select_user = prepare("SELECT * FROM users WHERE id = ?")
 
 
 @with_db_connection
 def get_user_by_id(conn, user_id):
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    return cursor.fetchone()
+    return select_user(conn, (user_id,)).fetchone()
+
+
+@with_db_connection
+def get_users_by_ids(conn, user_ids):
+    """Fetch many users in one query, keyed by id"""
+    placeholders = ", ".join("?" * len(user_ids))
+    cursor = conn.execute(
+        f"SELECT * FROM users WHERE id IN ({placeholders})", tuple(user_ids)
+    )
+    return {row[0]: row for row in cursor}
+
+
+user_loader = DataLoader(lambda user_ids: get_users_by_ids(user_ids=user_ids))
 
 
 #### Fetch user by ID with automatic connection handling
 
 user = get_user_by_id(user_id=1)
 print(user)
+
+#### Fetch several users with one query instead of one each
+
+with user_loader.batch():
+    pending = user_loader.load_many([1, 2, 3])
+print([future.result() for future in pending])
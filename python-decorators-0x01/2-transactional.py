@@ -1,44 +1,43 @@
-import sqlite3
 import functools
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 
-"""your code goes here"""
+from db_pool import DEFAULT_DB, get_pool, with_db_connection
+from query_cache import table_versions, track_writes
 
+# ids of the connections a group commit is open on in this thread
+_groups = threading.local()
+_savepoints = itertools.count()
 
-def with_db_connection(func):
-    """
-    Decorator that opens a DB connection, passes it to the function,
-    and closes it afterwards.
-    """
 
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            conn = None
-            try:
-                # Open a database connection
-                conn = sqlite3.connect("users.db")
-                cursor = conn.cursor()
-                # pass the connection to the decorated function
-                result = func(*args, conn=conn, cursor=cursor, **kwargs)
-                conn.commit()  # Commit any changes if needed
-                return result
-            except Exception as e:
-                if conn:
-                    conn.rollback()
-                raise e
-            finally:
-                if conn:
-                    conn.close()
+def _grouped(conn):
+    return id(conn) in getattr(_groups, "conns", ())
 
-        return wrapper
 
-    return decorator
+@contextmanager
+def _savepoint(conn):
+    """Roll back only the work done inside the block if it fails"""
+    name = f"sp_{next(_savepoints)}"
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
 
 
 def transactional(func):
     """
     Decorator that wraps the function in a database transaction.
     Commits the transaction if the function succeeds, rolls back if it fails.
+    Inside group_commit the call runs in a savepoint instead, so a failure
+    still undoes just this call and the commit happens once for the group.
     """
 
     @functools.wraps(func)
@@ -46,9 +45,15 @@ def transactional(func):
         conn = kwargs.get("conn")
         if conn is None:
             raise ValueError("Database connection not provided to the function.")
+        if _grouped(conn):
+            with _savepoint(conn):
+                return func(*args, **kwargs)
         try:
-            result = func(*args, **kwargs)
+            with track_writes(conn) as written:
+                result = func(*args, **kwargs)
             conn.commit()
+            # drop cached reads of the tables this transaction changed
+            table_versions.bump(written)
             return result
         except Exception as e:
             conn.rollback()
@@ -57,6 +62,145 @@ def transactional(func):
     return wrapper
 
 
+class group_commit:
+    """
+    Coalesce the transactional calls made in this thread into one commit.
+    Use it as ``with group_commit():`` or as a decorator. Every
+    with_db_connection call inside shares the thread's pooled connection,
+    each transactional call gets its own savepoint, and the group is
+    committed (or rolled back, on an exception) when the block ends.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self._scopes = []
+
+    def __enter__(self):
+        scope = get_pool(self.db_path).connection()
+        conn = scope.__enter__()
+        self._scopes.append((scope, conn))
+        if not _grouped(conn):
+            if not conn.in_transaction:
+                # savepoints must nest inside a real transaction, or
+                # releasing the first one would commit
+                conn.execute("BEGIN")
+            _groups.conns = getattr(_groups, "conns", set()) | {id(conn)}
+        return conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        scope, conn = self._scopes.pop()
+        if not any(c is conn for _, c in self._scopes):
+            _groups.conns = _groups.conns - {id(conn)}
+        return scope.__exit__(exc_type, exc_value, traceback)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with group_commit(self.db_path):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+class GroupCommitter:
+    """
+    Background writer that commits queued calls in groups.
+    submit() queues a with_db_connection function such as
+    update_user_email and returns a Future. A worker thread runs queued
+    calls inside group_commit, each in its own savepoint, and commits
+    every ``max_ops`` calls or ``interval`` seconds, whichever comes
+    first. Futures resolve once their group is committed.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB, max_ops=500, interval=0.05):
+        self.db_path = db_path
+        self.max_ops = max_ops
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` for the next group"""
+        if self._stopped:
+            raise RuntimeError("GroupCommitter is closed")
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def close(self):
+        """Flush what is queued and stop the worker"""
+        if not self._stopped:
+            self._stopped = True
+            self._queue.put(None)
+            self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _run(self):
+        stopped = False
+        while not stopped:
+            batch = []
+            try:
+                stopped = self._collect(batch)
+                if batch:
+                    self._commit(batch)
+            except BaseException as e:
+                # keep the worker alive; nothing queued may wait forever
+                self._fail(batch, e)
+
+    def _collect(self, batch):
+        """Fill ``batch`` for the next group; True once close() was called"""
+        first = self._queue.get()
+        if first is None:
+            return True
+        batch.append(first)
+        flush_at = time.monotonic() + self.interval
+        while len(batch) < self.max_ops:
+            wait = max(0, flush_at - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                break
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _commit(self, batch):
+        done = []
+        try:
+            with group_commit(self.db_path) as conn:
+                for future, func, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with _savepoint(conn):
+                            result = func(*args, **kwargs)
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        done.append((future, result))
+        except Exception as e:
+            # the group never started or was rolled back
+            self._fail(batch, e)
+            return
+        for future, result in done:
+            future.set_result(result)
+
+    @staticmethod
+    def _fail(batch, error):
+        for future, *_ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
 @with_db_connection
 @transactional
 def update_user_email(conn, user_id, new_email):
@@ -64,6 +208,6 @@ def update_user_email(conn, user_id, new_email):
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
 
 
-#### Update user's email with automatic transaction handling
-
-update_user_email(user_id=1, new_email="Crawford_Cartwright@hotmail.com")
+if __name__ == "__main__":
+    #### Update user's email with automatic transaction handling
+    update_user_email(user_id=1, new_email="Crawford_Cartwright@hotmail.com")
@@ -1,61 +1,145 @@
-import time
-import sqlite3
+import asyncio
 import functools
+import inspect
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
 
+from db_pool import with_db_connection
 
-#### paste your with_db_decorator here
-def with_db_connection(func):
-    """
-    Decorator that opens a DB connection, passes it to the function,
-    and closes it afterwards.
+
+TRANSIENT_ERRORS = ("database is locked", "database table is locked", "busy")
+
+
+def is_transient(error):
+    """True for errors worth retrying, e.g. SQLite lock contention"""
+    return isinstance(error, sqlite3.OperationalError) and any(
+        message in str(error).lower() for message in TRANSIENT_ERRORS
+    )
+
+
+class RetryBudget:
+    """A token bucket of retries shared by every caller that uses it
+
+    Each retry spends a token and tokens refill at ``rate`` per second,
+    so a burst of failures cannot turn into a retry storm.
     """
 
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            conn = None
-            try:
-                # Open a database connection
-                conn = sqlite3.connect("users.db")
-                cursor = conn.cursor()
-                # pass the connection to the decorated function
-                result = func(*args, conn=conn, cursor=cursor, **kwargs)
-                conn.commit()  # Commit any changes if needed
-                return result
-            except Exception as e:
-                if conn:
-                    conn.rollback()
-                raise e
-            finally:
-                if conn:
-                    conn.close()
+    def __init__(self, capacity=50, rate=10):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
 
-        return wrapper
+    def spend(self):
+        """Take one token, returning False if there is none left"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
 
-    return decorator
+
+class RetryMetrics:
+    """Counters of calls, attempts, retries and give-ups"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counts)
 
 
-def retry_on_failure(retries=3, delay=2):
+retry_budget = RetryBudget()
+retry_metrics = RetryMetrics()
+
+
+def retry_on_failure(
+    retries=3,
+    delay=2,
+    max_delay=30,
+    deadline=None,
+    retry_if=is_transient,
+    budget=retry_budget,
+    metrics=retry_metrics,
+):
     """
-    Decorator that retries a function upon failure.
-    :param retries: Number of retry attempts
-    :param delay: Delay between retries in seconds
+    Decorator that retries a function upon transient failure.
+    :param retries: Total number of attempts
+    :param delay: Base delay in seconds; attempt n waits a random time
+        between 0 and min(max_delay, delay * 2 ** n) ("full jitter")
+    :param max_delay: Upper bound of a single wait
+    :param deadline: Give up once this many seconds have passed overall
+    :param retry_if: Predicate choosing which exceptions are retried
+    :param budget: Shared RetryBudget, or None for unlimited retries
+    :param metrics: RetryMetrics collecting attempts and give-ups
+    Coroutine functions are retried with ``await asyncio.sleep``.
     """
 
+    def backoff(attempt, error, started):
+        """Seconds to wait before the next attempt, or None to give up"""
+        if not retry_if(error):
+            metrics.increment("not_retried")
+            return None
+        if attempt + 1 >= retries:
+            metrics.increment("give_ups")
+            return None
+        wait = random.uniform(0, min(max_delay, delay * 2**attempt))
+        if deadline is not None and time.monotonic() + wait - started > deadline:
+            metrics.increment("deadline_exceeded")
+            return None
+        if budget is not None and not budget.spend():
+            metrics.increment("budget_exhausted")
+            return None
+        metrics.increment("retries")
+        return wait
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                metrics.increment("calls")
+                started = time.monotonic()
+                for attempt in range(retries):
+                    metrics.increment("attempts")
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        wait = backoff(attempt, e, started)
+                        if wait is None:
+                            raise
+                    await asyncio.sleep(wait)
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
+            metrics.increment("calls")
+            started = time.monotonic()
             for attempt in range(retries):
+                metrics.increment("attempts")
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    print(
-                        f"Attempt {attempt + 1} failed: {e}. Retrying in {delay} seconds..."
-                    )
-                    time.sleep(delay)
-            raise last_exception
+                    wait = backoff(attempt, e, started)
+                    if wait is None:
+                        raise
+                time.sleep(wait)
 
         return wrapper
 
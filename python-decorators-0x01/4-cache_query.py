@@ -1,59 +1,50 @@
-import time
-import sqlite3
 import functools
 
+from db_pool import with_db_connection
+from profiler import profiler
+from query_cache import QueryCache, tables_read
+from single_flight import single_flight
 
-"""your code goes here"""
 
+query_cache = QueryCache()
 
-def with_db_connection(func):
+
+def cache_query(func=None, *, cache=query_cache):
     """
-    Decorator that opens a DB connection, passes it to the function,
-    and closes it afterwards.
+    Decorator that caches query results keyed on the normalized query
+    and its parameters. Entries expire after the cache's TTL, are
+    evicted least recently used first, and are dropped as soon as a
+    write to one of the tables they read is committed.
     """
 
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            conn = None
-            try:
-                # Open a database connection
-                conn = sqlite3.connect("users.db")
-                cursor = conn.cursor()
-                # pass the connection to the decorated function
-                result = func(*args, conn=conn, cursor=cursor, **kwargs)
-                conn.commit()  # Commit any changes if needed
+            query = kwargs.get("query", "") or (args[1] if len(args) > 1 else "")
+            params = kwargs.get("params", ())
+            key = cache.key(query, params)
+            hit, result = cache.get(key)
+            if hit:
                 return result
-            except Exception as e:
-                if conn:
-                    conn.rollback()
-                raise e
-            finally:
-                if conn:
-                    conn.close()
+            tables = tables_read(query)
+            snapshot = cache.versions.snapshot(tables)
+            result = func(*args, **kwargs)
+            cache.put(key, result, tables, snapshot)
+            return result
 
+        wrapper.cache = cache
         return wrapper
 
+    if func is not None:
+        return decorator(func)
     return decorator
 
 
-def cache_query(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query_cache = {}
-        query = kwargs.get("query", "") or (args[1] if len(args) > 1 else "")
-        if query in query_cache:
-            print("Using cached result for query.")
-            return query_cache[query]
-        result = func(*args, **kwargs)
-        query_cache[query] = result
-        return result
-
-    return wrapper
-
-
+# concurrent cold misses for the same query share one trip to the database
+@single_flight
 @with_db_connection
 @cache_query
+@profiler.profile
 def fetch_users_with_cache(conn, query):
     cursor = conn.cursor()
     cursor.execute(query)
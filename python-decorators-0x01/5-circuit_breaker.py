@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+import functools
+import inspect
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from db_pool import with_db_connection
+
+try:
+    from mysql.connector import errors as mysql_errors
+except ImportError:  # the MySQL driver is optional here
+    mysql_errors = None
+
+# sqlite3 raises OperationalError for bad SQL too, so outages go by message
+OUTAGE_ERRORS = (
+    "unable to open database file",
+    "disk i/o error",
+    "database is locked",
+    "database table is locked",
+    "database disk image is malformed",
+    "is not a database",
+    "database or disk is full",
+    "out of memory",
+)
+MYSQL_OUTAGES = ()
+if mysql_errors is not None:
+    MYSQL_OUTAGES = (
+        mysql_errors.OperationalError,
+        mysql_errors.InterfaceError,
+        mysql_errors.PoolError,
+    )
+
+
+def is_outage(error):
+    """True for errors that mean the database itself is failing, not the query"""
+    if isinstance(error, sqlite3.DatabaseError):
+        return any(message in str(error).lower() for message in OUTAGE_ERRORS)
+    return isinstance(error, (OSError,) + MYSQL_OUTAGES)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the database while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Decorator that stops calling a failing database for a while.
+    :param failure_rate: Fraction of failed calls in the window that opens
+        the circuit
+    :param window: Number of most recent calls the rate is computed over
+    :param min_calls: Calls needed in the window before it can open
+    :param reset_timeout: Seconds to stay open before letting probes through
+    :param half_open_calls: Probe calls allowed, and needed to succeed,
+        before closing again
+    :param is_failure: Predicate telling whether an exception means the
+        database is failing; by default SQLite outages (locked, missing
+        or corrupt files, I/O errors) and, when installed, mysql.connector
+        connection errors. Syntax and schema errors don't count.
+    Put it outside with_db_connection and retry_on_failure, so an open
+    circuit fails before a connection is taken or a retry is scheduled.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate=0.5,
+        window=20,
+        min_calls=10,
+        reset_timeout=30,
+        half_open_calls=1,
+        is_failure=is_outage,
+    ):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure
+        self.state = self.CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        # bumped on every state change so late outcomes can be told apart
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Let a call through or raise CircuitOpenError
+
+        Returns the generation the call was admitted in, to pass back
+        to record().
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    raise CircuitOpenError("circuit open, database calls suspended")
+                self._set_state(self.HALF_OPEN)
+                self.probes = self.probe_successes = 0
+            if self.state == self.HALF_OPEN:
+                if self.probes >= self.half_open_calls:
+                    raise CircuitOpenError("circuit half-open, probe in flight")
+                self.probes += 1
+            return self.generation
+
+    def record(self, failed, generation=None):
+        """Record the outcome of a call that was let through
+
+        An outcome from a call admitted in an earlier generation, e.g.
+        a slow call let through while closed that ends after the
+        circuit opened, is ignored so it cannot pose as a probe.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if self.state == self.HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self.probe_successes += 1
+                    if self.probe_successes >= self.half_open_calls:
+                        self._set_state(self.CLOSED)
+                        self.outcomes.clear()
+                        self.failures = 0
+                return
+            if len(self.outcomes) == self.outcomes.maxlen:
+                self.failures -= self.outcomes[0]
+            self.outcomes.append(failed)
+            self.failures += failed
+            if (
+                self.state == self.CLOSED
+                and len(self.outcomes) >= self.min_calls
+                and self.failures / len(self.outcomes) >= self.failure_rate
+            ):
+                self._open()
+
+    def _open(self):
+        self._set_state(self.OPEN)
+        self.opened_at = time.monotonic()
+
+    def _set_state(self, state):
+        self.state = state
+        self.generation += 1
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                generation = self.before_call()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    self.record(self.is_failure(e), generation)
+                    raise
+                self.record(False, generation)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generation = self.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                self.record(self.is_failure(e), generation)
+                raise
+            self.record(False, generation)
+            return result
+
+        return wrapper
+
+
+users_db_breaker = CircuitBreaker()
+
+
+@users_db_breaker
+@with_db_connection
+def fetch_users_with_breaker(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+if __name__ == "__main__":
+    #### fails fast once users.db keeps failing
+    try:
+        users = fetch_users_with_breaker()
+        print(users)
+    except CircuitOpenError as e:
+        print(e)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Microbenchmark of decorated calls/sec: connect-per-call vs pooled.
+
+    ./bench_db_pool.py [db_path] [calls]
+"""
+import functools
+import sqlite3
+import sys
+import time
+
+from db_pool import get_pool, with_db_connection
+
+
+def connect_per_call(db_path):
+    """The previous with_db_connection: open and close on every call"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            conn = sqlite3.connect(db_path)
+            try:
+                result = func(*args, conn=conn, **kwargs)
+                conn.commit()
+                return result
+            finally:
+                conn.close()
+
+        return wrapper
+
+    return decorator
+
+
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def main(db_path, calls):
+    select_user = get_pool(db_path).prepare("SELECT * FROM users WHERE id = ?")
+
+    def get_user_prepared(conn, user_id):
+        return select_user(conn, (user_id,)).fetchone()
+
+    variants = [
+        ("connect-per-call", connect_per_call(db_path)(get_user_by_id)),
+        ("pooled", with_db_connection(db_path=db_path)(get_user_by_id)),
+        ("pooled+prepared", with_db_connection(db_path=db_path)(get_user_prepared)),
+    ]
+    print("variant\tcalls_per_s\tus_per_call")
+    for name, lookup in variants:
+        start = time.perf_counter()
+        for n in range(calls):
+            lookup(user_id=n % 1000 + 1)
+        elapsed = time.perf_counter() - start
+        print(f"{name}\t{calls / elapsed:.0f}\t{elapsed / calls * 1e6:.1f}")
+    print("statement cache:", get_pool(db_path).statement_stats())
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "test_users.db",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20000,
+    )
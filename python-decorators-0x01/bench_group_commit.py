@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark updates/sec of email updates: one commit each vs grouped.
+
+Works on a copy of the database so the original is left untouched.
+
+    ./bench_group_commit.py [db_path] [updates]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from db_pool import get_pool, with_db_connection
+
+transactions = __import__("2-transactional")
+
+
+def main(db_path, updates):
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, "users.db")
+        shutil.copy(db_path, copy)
+        try:
+            run_modes(copy, updates)
+        finally:
+            get_pool(copy).close()
+
+
+def run_modes(copy, updates):
+
+    @with_db_connection(db_path=copy)
+    @transactions.transactional
+    def update_user_email(conn, user_id, new_email):
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE users SET email = ? WHERE id = ?", (new_email, user_id)
+        )
+
+    def individual(n):
+        for i in range(n):
+            update_user_email(user_id=i % 1000 + 1, new_email=f"user{i}@example.com")
+
+    def grouped(n):
+        with transactions.group_commit(copy):
+            individual(n)
+
+    def background(n):
+        with transactions.GroupCommitter(copy) as committer:
+            futures = [
+                committer.submit(
+                    update_user_email,
+                    user_id=i % 1000 + 1,
+                    new_email=f"user{i}@example.com",
+                )
+                for i in range(n)
+            ]
+        for future in futures:
+            future.result()
+
+    print("mode\tupdates\twall_s\tupdates_per_s")
+    for name, run in (
+        ("individual", individual),
+        ("grouped", grouped),
+        ("background", background),
+    ):
+        start = time.perf_counter()
+        run(updates)
+        elapsed = time.perf_counter() - start
+        print(f"{name}\t{updates}\t{elapsed:.2f}\t{updates / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "test_users.db",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10000,
+    )
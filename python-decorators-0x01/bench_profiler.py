@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Benchmark the per-call overhead of the query profiler.
+
+Times a no-op "query" function bare, profiled and disabled, profiled at
+a 1% sample rate and fully profiled, then one real SQLite lookup.
+
+    ./bench_profiler.py [db_path] [calls]
+"""
+import sqlite3
+import sys
+import time
+
+from profiler import QueryProfiler
+
+QUERY = "SELECT * FROM users WHERE id = 1"
+
+
+def per_call(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(query=QUERY)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main(db_path, calls):
+    conn = sqlite3.connect(db_path)
+
+    def noop(query):
+        return None
+
+    def lookup(query):
+        return conn.execute(query).fetchall()
+
+    print("function\tprofiler\tns_per_call\toverhead_ns")
+    for name, func in (("noop", noop), ("sqlite", lookup)):
+        bare = per_call(func, calls)
+        print(f"{name}\tnone\t{bare:.0f}\t0")
+        for label, options in (
+            ("disabled", {"enabled": False}),
+            ("sampled 1%", {"sample_rate": 0.01}),
+            ("enabled", {}),
+        ):
+            profiled = QueryProfiler(**options).profile(func)
+            cost = per_call(profiled, calls)
+            print(f"{name}\t{label}\t{cost:.0f}\t{cost - bare:.0f}")
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "test_users.db",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200000,
+    )
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+import asyncio
+import inspect
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class DataLoader:
+    """Batch point lookups into one query per batch
+
+    ``batch_fn(keys)`` fetches many keys at once, e.g. with
+    ``SELECT ... WHERE id IN (...)``, and returns a mapping of key to
+    value; keys missing from it resolve to None.
+
+    In sync code, ``load()`` inside ``with loader.batch():`` returns a
+    Future and the keys collected are fetched together when the
+    outermost block exits (or on ``dispatch()``). Outside a batch block
+    ``load()`` fetches straight away. Results are cached by key until
+    the outermost block exits.
+
+    In async code, ``await loader.aload(key)`` collects the keys
+    requested during one event loop tick and fetches them with a single
+    call; a plain ``batch_fn`` runs in the default executor so the loop
+    is not blocked. Results are cached until ``clear()``, so create one
+    loader per request.
+
+    A loader is not thread-safe; use one per thread.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=500):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self._cache = {}
+        # (key, future) pairs waiting for the next dispatch
+        self._pending = []
+        self._depth = 0
+        self._scheduled = False
+        # batch tasks in flight, referenced so they are not collected
+        self._tasks = set()
+        self.stats = {"loads": 0, "batches": 0, "keys": 0}
+
+    @contextmanager
+    def batch(self):
+        """Collect the keys loaded in the block and fetch them on exit"""
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._depth == 1:
+                for _, future in self._pending:
+                    future.cancel()
+                self._pending = []
+            raise
+        else:
+            if self._depth == 1:
+                self.dispatch()
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._cache.clear()
+
+    def load(self, key):
+        """A Future for the value of ``key``"""
+        self.stats["loads"] += 1
+        future = self._cache.get(key)
+        if future is None:
+            future = Future()
+            self._pending.append((key, future))
+            if self._depth:
+                self._cache[key] = future
+            else:
+                self.dispatch()
+        return future
+
+    def load_many(self, keys):
+        return [self.load(key) for key in keys]
+
+    def dispatch(self):
+        """Fetch every key collected so far"""
+        pending, self._pending = self._pending, []
+        for chunk in self._chunks(pending):
+            try:
+                values = self.batch_fn([key for key, _ in chunk])
+            except Exception as e:
+                values = e
+            self._resolve(chunk, values)
+
+    async def aload(self, key):
+        """The value of ``key``, fetched together with this tick's other keys"""
+        self.stats["loads"] += 1
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            self._pending.append((key, future))
+            if not self._scheduled:
+                # runs after every coroutine already scheduled this tick
+                self._scheduled = True
+                loop.call_soon(self._dispatch_tick)
+        # a cancelled caller must not cancel the value for the others
+        return await asyncio.shield(future)
+
+    async def aload_many(self, keys):
+        return await asyncio.gather(*(self.aload(key) for key in keys))
+
+    def _dispatch_tick(self):
+        self._scheduled = False
+        pending, self._pending = self._pending, []
+        for chunk in self._chunks(pending):
+            task = asyncio.ensure_future(self._fetch_async(chunk))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_async(self, chunk):
+        keys = [key for key, _ in chunk]
+        try:
+            if inspect.iscoroutinefunction(self.batch_fn):
+                values = await self.batch_fn(keys)
+            else:
+                loop = asyncio.get_running_loop()
+                values = await loop.run_in_executor(None, self.batch_fn, keys)
+        except Exception as e:
+            values = e
+        self._resolve(chunk, values)
+
+    def _chunks(self, pending):
+        for start in range(0, len(pending), self.max_batch_size):
+            chunk = pending[start : start + self.max_batch_size]
+            self.stats["batches"] += 1
+            self.stats["keys"] += len(chunk)
+            yield chunk
+
+    def _resolve(self, chunk, values):
+        for key, future in chunk:
+            if future.done():
+                continue
+            if isinstance(values, Exception):
+                # let a later load of the key try again
+                if self._cache.get(key) is future:
+                    del self._cache[key]
+                future.set_exception(values)
+            else:
+                future.set_result(values.get(key))
+
+    def clear(self):
+        self._cache.clear()
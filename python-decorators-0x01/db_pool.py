@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+import functools
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from query_cache import table_versions, track_writes
+
+DEFAULT_DB = "users.db"
+
+# applied once to every new connection
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative means KiB
+}
+
+
+class ConnectionPool:
+    """Warm SQLite connections for one database file
+
+    A thread keeps the same connection for as long as it holds one, so
+    nested decorated calls share it and only the outermost one commits.
+    """
+
+    def __init__(
+        self, path, size=8, pragmas=PRAGMAS, timeout=30, cached_statements=256
+    ):
+        self.path = path
+        self.size = size
+        self.pragmas = dict(pragmas)
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._statement_stats = []
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=StatementCountingConnection,
+        )
+        self._statement_stats.append(conn.statement_stats)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def prepare(self, sql):
+        """Return a reusable handle for ``sql`` on this pool's connections"""
+        return PreparedStatement(self, sql)
+
+    def statement_stats(self):
+        """Statement cache hits, misses and hit rate across all connections"""
+        hits = sum(stats.hits for stats in self._statement_stats)
+        misses = sum(stats.misses for stats in self._statement_stats)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+    def acquire(self):
+        """Return this thread's connection, checking one out if needed"""
+        if getattr(self._local, "depth", 0):
+            self._local.depth += 1
+            return self._local.conn
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"no connection to {self.path} available within {self.timeout}s"
+            )
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn):
+        """Give back a connection taken with acquire()"""
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+        self._slots.release()
+
+    @property
+    def depth(self):
+        """How many nested acquire() calls this thread currently holds"""
+        return getattr(self._local, "depth", 0)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, committing or rolling back at the outermost level"""
+        conn = self.acquire()
+        outermost = self._local.depth == 1
+        try:
+            with track_writes(conn) as written:
+                yield conn
+            if outermost:
+                conn.commit()
+                table_versions.bump(written)
+        except BaseException:
+            if outermost:
+                conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+
+
+class StatementCacheStats:
+    """Hits and misses of one connection's compiled-statement cache
+
+    sqlite3 keeps the last ``capacity`` statements it compiled on a
+    connection in an LRU keyed on the SQL text. It doesn't expose hits,
+    so the same LRU is replayed over every SQL string the connection
+    executes.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.recent = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, sql):
+        if sql in self.recent:
+            self.recent.move_to_end(sql)
+            self.hits += 1
+            return
+        self.misses += 1
+        self.recent[sql] = None
+        if len(self.recent) > self.capacity:
+            self.recent.popitem(last=False)
+
+
+class StatementCountingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.statement_stats.record(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.statement_stats.record(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class StatementCountingConnection(sqlite3.Connection):
+    """sqlite3 connection that counts its statement cache hits
+
+    Every execute, on the connection or on any of its cursors, is
+    recorded in ``statement_stats``. executescript() bypasses sqlite3's
+    cache and isn't counted.
+    """
+
+    def __init__(self, *args, cached_statements=128, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        self.statement_stats = StatementCacheStats(cached_statements)
+
+    def cursor(self, factory=StatementCountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        self.statement_stats.record(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.statement_stats.record(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class PreparedStatement:
+    """A named handle for a SQL string run on pooled connections
+
+    sqlite3 caches compiled statements per connection by SQL text, so
+    the handle adds no cache of its own; it names a statement that is
+    reused verbatim, and its reuse shows up in the pool's
+    statement_stats() like any other execute.
+    """
+
+    def __init__(self, pool, sql):
+        self.pool = pool
+        self.sql = sql
+
+    def execute(self, conn, params=()):
+        """Run the statement on ``conn`` and return the cursor"""
+        return conn.execute(self.sql, params)
+
+    __call__ = execute
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DEFAULT_DB, **options):
+    """Return the shared pool for ``path``, creating it on first use"""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, **options)
+        return pool
+
+
+def prepare(sql, db_path=DEFAULT_DB):
+    """Prepared-statement handle for ``sql`` on the pool of ``db_path``"""
+    return get_pool(db_path).prepare(sql)
+
+
+def with_db_connection(func=None, *, db_path=DEFAULT_DB):
+    """
+    Decorator that borrows a pooled DB connection, passes it to the
+    function, and hands it back to the pool afterwards.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_pool(db_path).connection() as conn:
+                return func(*args, conn=conn, **kwargs)
+
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
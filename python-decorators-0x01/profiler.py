@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+import atexit
+import functools
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+from collections import deque
+
+LITERALS = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\b0x[0-9a-fA-F]+\b|\b\d+(?:\.\d+)?\b"
+)
+IN_LISTS = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+# "SCAN users" (or "SCAN TABLE users" before SQLite 3.36) without an index
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bINDEX\b)")
+# frames skipped when looking for the code that made a profiled call
+DECORATOR_MODULES = {"db_pool", "query_cache", "single_flight", "profiler"}
+WRAPPER_NAMES = {"wrapper", "async_wrapper"}
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(query):
+    """The shape of a query: literals become ``?`` and IN lists collapse"""
+    shape = LITERALS.sub("?", query)
+    shape = IN_LISTS.sub("IN (?)", shape)
+    return WHITESPACE.sub(" ", shape).strip().rstrip(";")
+
+
+@functools.lru_cache(maxsize=256)
+def _decorator_module(filename):
+    return os.path.splitext(os.path.basename(filename))[0] in DECORATOR_MODULES
+
+
+def call_site(frame):
+    """``file:line`` of the first frame outside the decorator stack"""
+    while frame.f_back is not None and (
+        frame.f_code.co_name in WRAPPER_NAMES
+        or _decorator_module(frame.f_code.co_filename)
+    ):
+        frame = frame.f_back
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+def connection_argument(args, kwargs):
+    """The sqlite3 connection a decorated call runs on, if it was given one"""
+    conn = kwargs.get("conn")
+    if conn is None:
+        conn = next((a for a in args if isinstance(a, sqlite3.Connection)), None)
+    return conn
+
+
+def query_argument(args, kwargs):
+    """The SQL a decorated call is about to run"""
+    query = kwargs.get("query")
+    if query is None:
+        query = next((arg for arg in args if isinstance(arg, str)), "")
+    return query
+
+
+class QueryProfiler:
+    """Collects per-query timings into a bounded ring buffer
+
+    Recording is a single ``deque.append``, which is atomic, so threads
+    never wait on each other. Only a ``sample_rate`` fraction of calls
+    is timed, and a disabled profiler costs one attribute check.
+
+    With ``explain_threshold`` (seconds) set, the first sampled call of
+    each query shape that takes at least that long also runs
+    ``EXPLAIN QUERY PLAN`` on the call's own connection, and the plan is
+    kept in ``plans`` along with the tables it scans without an index.
+    """
+
+    def __init__(
+        self, capacity=10000, sample_rate=1.0, enabled=True, explain_threshold=None
+    ):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.explain_threshold = explain_threshold
+        # (fingerprint, seconds, rows, caller)
+        self.records = deque(maxlen=capacity)
+        # fingerprint -> {"plan": [...], "full_scans": [...]}
+        self.plans = {}
+
+    def profile(self, func):
+        """Decorator recording every sampled call of ``func``"""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or (
+                self.sample_rate < 1 and random.random() >= self.sample_rate
+            ):
+                return func(*args, **kwargs)
+            rows = None
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                if isinstance(result, list):
+                    rows = len(result)
+                elif result is not None:
+                    rows = 1
+            finally:
+                duration = time.perf_counter() - start
+                query = query_argument(args, kwargs)
+                shape = fingerprint(query)
+                self.records.append(
+                    (shape, duration, rows, call_site(sys._getframe(1)))
+                )
+            if (
+                self.explain_threshold is not None
+                and duration >= self.explain_threshold
+                and shape not in self.plans
+            ):
+                conn = connection_argument(args, kwargs)
+                if conn is not None:
+                    self.plans[shape] = explain(conn, query, kwargs.get("params", ()))
+            return result
+
+        return wrapper
+
+    def summary(self):
+        """Aggregate the buffer per fingerprint"""
+        stats = {}
+        for shape, duration, rows, caller in list(self.records):
+            entry = stats.get(shape)
+            if entry is None:
+                entry = stats[shape] = {
+                    "query": shape,
+                    "calls": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                    "rows": 0,
+                    "callers": set(),
+                }
+            entry["calls"] += 1
+            entry["total"] += duration
+            entry["max"] = max(entry["max"], duration)
+            entry["rows"] += rows or 0
+            entry["callers"].add(caller)
+        for entry in stats.values():
+            entry["mean"] = entry["total"] / entry["calls"]
+        return list(stats.values())
+
+    def top_slow(self, n=10):
+        """The ``n`` query shapes with the highest mean duration"""
+        return sorted(self.summary(), key=lambda e: e["mean"], reverse=True)[:n]
+
+    def top_frequent(self, n=10):
+        """The ``n`` most frequently run query shapes"""
+        return sorted(self.summary(), key=lambda e: e["calls"], reverse=True)[:n]
+
+    def full_scans(self):
+        """Query shapes whose captured plan scans a table without an index"""
+        return {
+            shape: plan["full_scans"]
+            for shape, plan in self.plans.items()
+            if plan["full_scans"]
+        }
+
+    def report(self, n=10, file=None):
+        """Print the top ``n`` slow and frequent queries and any full scans"""
+        file = file or sys.stderr
+        for title, entries in (
+            ("slowest", self.top_slow(n)),
+            ("most frequent", self.top_frequent(n)),
+        ):
+            print(f"-- {title} queries --", file=file)
+            for entry in entries:
+                print(
+                    f"{entry['calls']:>8} calls {entry['mean'] * 1000:>10.3f} ms avg "
+                    f"{entry['max'] * 1000:>10.3f} ms max {entry['rows']:>8} rows  "
+                    f"{entry['query']}",
+                    file=file,
+                )
+        scans = self.full_scans()
+        if scans:
+            print("-- full table scans in slow queries --", file=file)
+            for shape, tables in scans.items():
+                print(f"{', '.join(tables):>20}  {shape}", file=file)
+
+    def report_at_exit(self, n=10):
+        """Print the report when the interpreter exits"""
+        atexit.register(self.report, n)
+
+    def clear(self):
+        self.records.clear()
+        self.plans.clear()
+
+
+def explain(conn, query, params=()):
+    """Run EXPLAIN QUERY PLAN for ``query`` and find its full table scans"""
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    except sqlite3.Error as err:
+        return {"plan": [], "full_scans": [], "error": str(err)}
+    plan = [row[-1] for row in rows]
+    scans = [m.group(1) for m in map(FULL_SCAN.match, plan) if m]
+    return {"plan": plan, "full_scans": scans}
+
+
+_explain_ms = os.getenv("QUERY_EXPLAIN_THRESHOLD_MS")
+
+profiler = QueryProfiler(
+    sample_rate=float(os.getenv("QUERY_PROFILE_SAMPLE_RATE", "1.0")),
+    enabled=os.getenv("QUERY_PROFILE", "1") != "0",
+    explain_threshold=float(_explain_ms) / 1000 if _explain_ms else None,
+)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+import functools
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+QUOTED = r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`(?:[^`]|``)*`"""
+# quoted literals and identifiers are matched whole so their spaces survive
+WHITESPACE = re.compile(rf"{QUOTED}|\s+")
+# an optional schema qualifier (main.users) is matched but not captured
+IDENTIFIER = r"(?:[\"`\[]?\w+[\"`\]]?\.)?[\"`\[]?(\w+)[\"`\]]?"
+READS = re.compile(
+    rf"\b(?:FROM|JOIN)\s+{IDENTIFIER}((?:\s+(?:AS\s+)?(?!WHERE|GROUP|ORDER|LIMIT|"
+    rf"JOIN|INNER|LEFT|RIGHT|CROSS|NATURAL|ON|UNION)\w+)?(?:\s*,\s*\w+"
+    rf"(?:\s+(?:AS\s+)?\w+)?)*)",
+    re.IGNORECASE,
+)
+WRITE_TARGET = (
+    rf"(?:(?:INSERT|REPLACE)(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|"
+    rf"DELETE\s+FROM|(?:DROP|ALTER|CREATE)\s+TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)"
+    rf"\s+{IDENTIFIER}"
+)
+WRITES = re.compile(rf"^\s*{WRITE_TARGET}", re.IGNORECASE)
+# the DML statement after a WITH clause
+CTE_WRITES = re.compile(rf"\b{WRITE_TARGET}", re.IGNORECASE)
+CTE = re.compile(r"^\s*WITH\b", re.IGNORECASE)
+READ_ONLY = re.compile(
+    r"^\s*(?:SELECT|VALUES|PRAGMA|EXPLAIN|BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|"
+    r"RELEASE)\b",
+    re.IGNORECASE,
+)
+DML = re.compile(r"\b(?:INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def normalize(query):
+    """Collapse whitespace outside quotes and drop the trailing semicolon"""
+    query = WHITESPACE.sub(lambda m: " " if m.group().isspace() else m.group(), query)
+    return query.strip().rstrip(";").rstrip()
+
+
+def tables_read(query):
+    """Names of the tables a SELECT reads, lowercased"""
+    tables = set()
+    for match in READS.finditer(query):
+        tables.add(match.group(1).lower())
+        for extra in match.group(2).split(",")[1:]:
+            tables.add(extra.split()[0].strip("\"`[]").lower())
+    return frozenset(tables)
+
+
+def tables_written(statement):
+    """Name of the table a statement modifies, as a set
+
+    Reads and transaction control write nothing. A write whose table
+    can't be parsed returns ``{TableVersions.UNKNOWN}``, which
+    invalidates every cached entry rather than none.
+    """
+    match = WRITES.match(statement)
+    if match is None and CTE.match(statement):
+        body = re.sub(QUOTED, "''", statement)
+        match = CTE_WRITES.search(body)
+        if match is None and not DML.search(body):
+            return frozenset()
+    elif match is None and READ_ONLY.match(statement):
+        return frozenset()
+    if match is None:
+        return frozenset([TableVersions.UNKNOWN])
+    return frozenset([match.group(1).lower()])
+
+
+class TableVersions:
+    """Per-table write counters that caches compare their entries against"""
+
+    ANY = "*"
+    # bumped by writes to a table that couldn't be parsed; every entry
+    # depends on it
+    UNKNOWN = "?"
+
+    def __init__(self):
+        self._versions = {}
+        self._caches = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def snapshot(self, tables):
+        """Current versions of ``tables``; an empty set depends on every write"""
+        tables = sorted(tables or [self.ANY]) + [self.UNKNOWN]
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, tables):
+        """Record a committed write to ``tables`` and drop dependent entries"""
+        if not tables:
+            return
+        with self._lock:
+            for table in set(tables) | {self.ANY}:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            caches = list(self._caches)
+        for cache in caches:
+            cache.invalidate(tables)
+
+    def register(self, cache):
+        with self._lock:
+            self._caches.add(cache)
+
+
+table_versions = TableVersions()
+_tracked = {}
+
+
+@contextmanager
+def track_writes(conn):
+    """Collect the tables written through ``conn`` inside the block
+
+    Uses the connection's trace callback, so every statement counts, no
+    matter which cursor runs it. Nested blocks on one connection all see
+    the writes made inside them.
+    """
+    written = set()
+    stack = _tracked.setdefault(id(conn), [])
+    if not stack:
+        conn.set_trace_callback(functools.partial(_record_write, id(conn)))
+    stack.append(written)
+    try:
+        yield written
+    finally:
+        stack.pop()
+        if not stack:
+            del _tracked[id(conn)]
+            conn.set_trace_callback(None)
+
+
+def _record_write(key, statement):
+    tables = tables_written(statement)
+    if tables:
+        for written in _tracked.get(key, ()):
+            written.update(tables)
+
+
+def approximate_size(value):
+    """Rough size in bytes of a query result (a list of row tuples)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for row in value:
+            size += sys.getsizeof(row)
+            if isinstance(row, tuple):
+                size += sum(sys.getsizeof(column) for column in row)
+    return size
+
+
+class QueryCache:
+    """A thread-safe LRU cache of query results with a TTL
+
+    Bounded both by number of entries and by the approximate size of the
+    cached results. Keeps hit, miss and eviction counters in ``stats``.
+    Each entry remembers the versions of the tables it read, and is
+    dropped once a committed write bumps any of them.
+    """
+
+    def __init__(
+        self,
+        max_entries=256,
+        max_bytes=16 * 1024 * 1024,
+        ttl=60,
+        versions=table_versions,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.stats = dict.fromkeys(
+            ("hits", "misses", "evictions", "expirations", "invalidations"), 0
+        )
+        self.versions = versions
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        versions.register(self)
+
+    @staticmethod
+    def key(query, params=()):
+        """Cache key for a query and its parameters"""
+        return normalize(query), tuple(params)
+
+    def get(self, key):
+        """Return ``(True, result)`` on a hit, ``(False, None)`` otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, size, expires, tables, snapshot = entry
+                if snapshot != self.versions.snapshot(tables):
+                    self._remove(key)
+                    self.stats["invalidations"] += 1
+                elif time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return True, result
+                else:
+                    self._remove(key)
+                    self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return False, None
+
+    def put(self, key, result, tables=frozenset(), snapshot=None):
+        """Cache ``result`` under ``key``, evicting the least recently used
+
+        ``snapshot`` is the versions of ``tables`` taken before the query
+        ran, so a write that commits while it runs makes it stale.
+        """
+        size = approximate_size(result)
+        if size > self.max_bytes:
+            return
+        if snapshot is None:
+            snapshot = self.versions.snapshot(tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires = time.monotonic() + self.ttl
+            self._entries[key] = (result, size, expires, tables, snapshot)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, tables):
+        """Drop the entries that read any of ``tables``"""
+        tables = set(tables)
+        everything = self.versions.UNKNOWN in tables
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if everything or not entry[3] or entry[3] & tables
+            ]
+            for key in stale:
+                self._remove(key)
+            self.stats["invalidations"] += len(stale)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        size = self._entries.pop(key)[1]
+        self.bytes -= size
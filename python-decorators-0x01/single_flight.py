@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import functools
+import threading
+from concurrent.futures import Future
+
+from profiler import query_argument
+from query_cache import QueryCache
+
+
+def query_key(args, kwargs):
+    """The normalized query and params a decorated call is about to run"""
+    return QueryCache.key(query_argument(args, kwargs), kwargs.get("params", ()))
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one execution
+
+    The first thread to ask for a key runs the call; threads asking for
+    the same key while it is in flight wait for it and get its result,
+    or its exception. Once the call finishes the key is forgotten, so
+    later calls run again (or hit a cache placed underneath).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> (Future, id of the thread running the call)
+        self._calls = {}
+        self.stats = {"executions": 0, "shared": 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """Return ``func(*args, **kwargs)``, sharing a run already in flight"""
+        me = threading.get_ident()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                future = Future()
+                self._calls[key] = (future, me)
+                self.stats["executions"] += 1
+            elif call[1] != me:
+                self.stats["shared"] += 1
+        if call is not None:
+            if call[1] == me:
+                # the running call asked for its own key; waiting would deadlock
+                return func(*args, **kwargs)
+            return call[0].result()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key):
+        with self._lock:
+            del self._calls[key]
+
+
+query_flight = SingleFlight()
+
+
+def single_flight(func=None, *, group=query_flight, key=query_key):
+    """
+    Decorator that lets concurrent calls with the same normalized query
+    and parameters share one execution. Put it outside with_db_connection
+    so waiting threads don't hold a pooled connection.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return group.do(key(args, kwargs), func, *args, **kwargs)
+
+        wrapper.group = group
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+  Unittests for the 5-circuit_breaker module.
+"""
+import sqlite3
+import unittest
+
+circuit_breaker = __import__("5-circuit_breaker")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """TestCircuitBreaker class to test CircuitBreaker."""
+
+    def setUp(self):
+        """Build a breaker that opens after two failures."""
+        self.breaker = circuit_breaker.CircuitBreaker(min_calls=2, window=2)
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+
+    def test_syntax_error_keeps_circuit_closed(self):
+        """Test that a buggy query does not open the circuit."""
+
+        @self.breaker
+        def query(sql):
+            return self.conn.execute(sql).fetchall()
+
+        for sql in ("SELEC 1", "SELECT * FROM missing", "SELEC 1"):
+            with self.assertRaises(sqlite3.OperationalError):
+                query(sql)
+        self.assertEqual(self.breaker.state, self.breaker.CLOSED)
+        self.assertEqual(query("SELECT 1"), [(1,)])
+
+    def test_outage_opens_circuit(self):
+        """Test that a database that cannot be opened opens the circuit."""
+
+        @self.breaker
+        def query():
+            sqlite3.connect("/nonexistent/dir/users.db").execute("SELECT 1")
+
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                query()
+        self.assertEqual(self.breaker.state, self.breaker.OPEN)
+        with self.assertRaises(circuit_breaker.CircuitOpenError):
+            query()
+
+    def test_is_outage(self):
+        """Test how database errors are classified."""
+        is_outage = circuit_breaker.is_outage
+        self.assertTrue(is_outage(sqlite3.OperationalError("database is locked")))
+        self.assertTrue(
+            is_outage(sqlite3.DatabaseError("database disk image is malformed"))
+        )
+        self.assertTrue(is_outage(OSError("connection reset")))
+        self.assertFalse(
+            is_outage(sqlite3.OperationalError('near "SELEC": syntax error'))
+        )
+        self.assertFalse(is_outage(sqlite3.OperationalError("no such table: x")))
+        self.assertFalse(is_outage(ValueError("bad input")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 import sqlite3
 import csv
 from functools import wraps
+from itertools import islice
 
 
 def with_db_connection(db_path="test_users.db"):
@@ -46,21 +47,75 @@ def setup_database(conn=None, cursor=None):
     print("Users table created.")
 
 
-@with_db_connection("test_users.db")
-def load_csv_to_db(csv_file, conn=None, cursor=None):
-    """Load user data from CSV into the users table."""
+def read_csv_chunks(csv_file, chunk_size=10000, stats=None):
+    """Yield lists of up to chunk_size (name, email, age) rows from a CSV.
+
+    Rows too short to hold every column are skipped and, when a stats
+    dict is given, counted in stats["malformed"].
+    """
     with open(csv_file, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                cursor.execute(
-                    "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
-                    (row["name"], row["email"], row["age"]),
-                )
-            except sqlite3.IntegrityError:
-                
-                pass
-    print(f"Data loaded from {csv_file}")
+        reader = csv.reader(f)
+        header = next(reader)
+        name, email, age = (header.index(c) for c in ("name", "email", "age"))
+        width = max(name, email, age) + 1
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            chunk = []
+            malformed = 0
+            for row in rows:
+                if len(row) >= width:
+                    chunk.append((row[name], row[email], row[age]))
+                elif row:  # blank lines are not rows
+                    malformed += 1
+            if stats is not None:
+                stats["malformed"] = stats.get("malformed", 0) + malformed
+            if chunk:
+                yield chunk
+
+
+@with_db_connection("test_users.db")
+def load_csv_to_db(
+    csv_file, conn=None, cursor=None, chunk_size=10000, rebuild_indexes=False
+):
+    """Bulk load user data from CSV into the users table.
+
+    Rows that clash with an existing name or email, and rows missing
+    columns, are skipped. The whole load is one transaction; with
+    rebuild_indexes, secondary indexes are dropped first and recreated
+    once the rows are in, so a failed load puts them back too.
+    """
+    conn.execute("PRAGMA journal_mode = WAL")
+    # sqlite3 doesn't open a transaction for DDL, so open it ourselves
+    # before DROP INDEX can commit on its own
+    cursor.execute("BEGIN")
+    indexes = []
+    if rebuild_indexes:
+        indexes = cursor.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = 'users' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+
+    before = conn.total_changes
+    stats = {}
+    total = 0
+    for chunk in read_csv_chunks(csv_file, chunk_size, stats):
+        cursor.executemany(
+            "INSERT INTO users (name, email, age) VALUES (?, ?, ?) "
+            "ON CONFLICT DO NOTHING",
+            chunk,
+        )
+        total += len(chunk)
+    inserted = conn.total_changes - before
+
+    for _, sql in indexes:
+        cursor.execute(sql)
+    skipped = total - inserted + stats.get("malformed", 0)
+    print(f"Data loaded from {csv_file}: {inserted} inserted, {skipped} skipped")
+    return inserted, skipped
 
 
 @with_db_connection("test_users.db")
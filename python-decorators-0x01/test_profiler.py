@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+  Unittests for the profiler module.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+from db_pool import get_pool, with_db_connection
+from profiler import QueryProfiler
+
+
+class TestQueryProfiler(unittest.TestCase):
+    """TestQueryProfiler class to test QueryProfiler."""
+
+    def setUp(self):
+        """Create a small database in a temporary directory."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "users.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INTEGER)")
+        conn.executemany("INSERT INTO users (age) VALUES (?)", [(20,), (40,)])
+        conn.commit()
+        conn.close()
+        self.addCleanup(lambda: get_pool(self.path).close())
+        self.profiler = QueryProfiler()
+
+    def test_caller_under_with_db_connection(self):
+        """Test that the caller is the call site, not a decorator wrapper."""
+
+        @with_db_connection(db_path=self.path)
+        @self.profiler.profile
+        def fetch_all_users(conn, query):
+            return conn.execute(query).fetchall()
+
+        line = sys._getframe().f_lineno + 1
+        rows = fetch_all_users(query="SELECT * FROM users WHERE age > 30")
+        self.assertEqual(len(rows), 1)
+        (entry,) = self.profiler.summary()
+        self.assertEqual(entry["query"], "SELECT * FROM users WHERE age > ?")
+        self.assertEqual(entry["callers"], {f"{__file__}:{line}"})
+
+
+if __name__ == "__main__":
+    unittest.main()
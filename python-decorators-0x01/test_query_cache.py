@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+  Unittests for the query_cache module.
+"""
+import sqlite3
+import unittest
+
+from query_cache import (
+    QueryCache,
+    TableVersions,
+    normalize,
+    tables_read,
+    tables_written,
+    track_writes,
+)
+
+# the same cases pin normalize in python-context-async-perations-0x02
+NORMALIZE_CASES = (
+    ("SELECT  *\n FROM users ;", "SELECT * FROM users"),
+    ("SELECT id  WHERE name = 'a  b'", "SELECT id WHERE name = 'a  b'"),
+    ("SELECT \"full  name\" FROM users", "SELECT \"full  name\" FROM users"),
+    ("SELECT 'it''s  here'\t;", "SELECT 'it''s  here'"),
+    ("SELECT `a  b`  FROM t", "SELECT `a  b` FROM t"),
+)
+
+
+class TestNormalize(unittest.TestCase):
+    """TestNormalize class to test normalize."""
+
+    def test_normalize(self):
+        """Test that whitespace collapses only outside quotes."""
+        for query, expected in NORMALIZE_CASES:
+            self.assertEqual(normalize(query), expected, query)
+
+
+class TestTablesWritten(unittest.TestCase):
+    """TestTablesWritten class to test tables_written."""
+
+    def test_plain_writes(self):
+        """Test that the written table is found, without its schema."""
+        for statement in (
+            "DELETE FROM users",
+            "INSERT INTO main.users (name) VALUES ('a')",
+            'UPDATE "main"."users" SET age = 1',
+            "WITH old AS (SELECT id FROM users) DELETE FROM users WHERE id IN old",
+        ):
+            self.assertEqual(tables_written(statement), {"users"}, statement)
+
+    def test_reads_write_nothing(self):
+        """Test that reads and transaction control write nothing."""
+        for statement in (
+            "SELECT * FROM users",
+            "WITH x AS (SELECT 'delete') SELECT * FROM x",
+            "PRAGMA journal_mode",
+            "BEGIN ",
+            "COMMIT",
+            "ROLLBACK TO sp_1",
+        ):
+            self.assertEqual(tables_written(statement), frozenset(), statement)
+
+    def test_unparsed_write_is_unknown(self):
+        """Test that a write to an unparsed table invalidates everything."""
+        for statement in ("CREATE INDEX idx_age ON users (age)", "VACUUM"):
+            self.assertEqual(
+                tables_written(statement), {TableVersions.UNKNOWN}, statement
+            )
+
+
+class TestInvalidation(unittest.TestCase):
+    """TestInvalidation class to test write-driven invalidation."""
+
+    def setUp(self):
+        """Cache one read of users against private table versions."""
+        self.versions = TableVersions()
+        self.cache = QueryCache(versions=self.versions)
+        self.conn = sqlite3.connect(":memory:")
+        self.addCleanup(self.conn.close)
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        self.key = QueryCache.key("SELECT * FROM users")
+        tables = tables_read("SELECT * FROM users")
+        self.cache.put(self.key, [], tables, self.versions.snapshot(tables))
+
+    def write(self, statement):
+        with track_writes(self.conn) as written:
+            self.conn.execute(statement)
+        self.conn.commit()
+        self.versions.bump(written)
+
+    def test_cte_delete_invalidates(self):
+        """Test that a DELETE behind a WITH clause drops cached reads."""
+        self.write("WITH x AS (SELECT 1) DELETE FROM users")
+        self.assertEqual(self.cache.get(self.key), (False, None))
+
+    def test_schema_qualified_insert_invalidates(self):
+        """Test that INSERT INTO main.users drops cached reads of users."""
+        self.write("INSERT INTO main.users DEFAULT VALUES")
+        self.assertEqual(self.cache.get(self.key), (False, None))
+
+    def test_unknown_write_invalidates(self):
+        """Test that an unparsed write drops every cached read."""
+        self.write("CREATE INDEX idx_id ON users (id)")
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,42 @@
 #!/usr/bin/env python3
-import mysql.connector
-import os
-from dotenv import load_dotenv
+from pool import get_pool
 
-load_dotenv()
 
+def stream_users(prefetch=100, limit=None, buffered=False):
+    """Stream all users in the database
 
-def stream_users():
-    """Stream all users in the database"""
-    db = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database=os.getenv("MYSQL_DATABASE"),
-    )
-    cursor = db.cursor()
-    cursor.execute("SELECT * FROM user_data")
-    for row in cursor.fetchall():
-        yield row
-    cursor.close()
-    db.close()
+    Rows are read through an unbuffered cursor ``prefetch`` rows at a
+    time, so memory stays flat whatever the size of ``user_data``.
+    ``buffered=True`` keeps the old fetch-everything behaviour.
+    """
+    pool = get_pool()
+    db = pool.acquire()
+    cursor = db.cursor(buffered=buffered)
+    exhausted = False
+    try:
+        if limit is None:
+            cursor.execute("SELECT * FROM user_data")
+        else:
+            cursor.execute("SELECT * FROM user_data LIMIT %s", (limit,))
+        if buffered:
+            rows = cursor.fetchall()
+            exhausted = True
+            for row in rows:
+                yield row
+            return
+        while True:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
+                exhausted = True
+                break
+            for row in rows:
+                yield row
+    finally:
+        if exhausted:
+            cursor.close()
+            pool.release(db)
+        else:
+            # the consumer stopped early: drop the socket instead of
+            # draining the rest of the result set over the wire
+            db.shutdown()
+            pool.release(db, discard=True)
@@ -1,27 +1,17 @@
 #!/usr/bin/env python3
-from seed import connect_db
+from query import Query, fetch_batches
 
 
-def stream_users_in_batches(batch_size):
+def stream_users_in_batches(batch_size, query=None):
     """Generator function to yield users in batches"""
+    yield from fetch_batches(query or Query(), batch_size)
 
-    cursor = connect_db.cursor()
-    cursor.execute("SELECT * FROM user_data")
-    while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        for row in rows:
-            yield row
 
+def batch_processing(batch_size, query=None):
+    """Generator function to yield batches of users over 25
 
-def batch_processing(batch_size):
-    """Generator function to yield users in batches"""
-    cursor = connect_db.cursor()
-    cursor.execute("SELECT * FROM user_data WHERE age > 25")
-    while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            return []
-        for row in rows:
-            yield row
+    ``query`` narrows the selection further; its columns, conditions and
+    limit are all evaluated by the database.
+    """
+    query = (query or Query()).where("age > %s", 25)
+    yield from fetch_batches(query, batch_size)
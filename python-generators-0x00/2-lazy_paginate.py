@@ -1,22 +1,60 @@
 #!/usr/bin/python3
-from seed import connect_db
+import re
+
+from pool import connection
+
+KEY_COLUMN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 
 def paginate_users(page_size, offset):
     """Generator function to yield users in pages"""
-    cursor = connect_db.cursor()
-    cursor.execute("SELECT * FROM user_data LIMIT %s OFFSET %s", (page_size, offset))
-    rows = cursor.fetchall()
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute(
+            "SELECT * FROM user_data LIMIT %s OFFSET %s", (page_size, offset)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
     for row in rows:
         yield row
 
 
-def lazy_paginate(page_size):
-    """Lazy pagination function"""
-    offset = 0
+def seek_users(page_size, last_key=None, key="user_id"):
+    """Fetch the page of users that comes after ``last_key``
+
+    Seeks on an indexed, unique ``key`` column, so every page costs the same no
+    matter how deep into the table it is. Returns the rows together with
+    the key of the last one, to be passed back in for the next page.
+    """
+    if not KEY_COLUMN.match(key):
+        raise ValueError(f"invalid key column: {key!r}")
+    with connection() as db:
+        cursor = db.cursor()
+        if last_key is None:
+            cursor.execute(
+                f"SELECT * FROM user_data ORDER BY {key} LIMIT %s", (page_size,)
+            )
+        else:
+            cursor.execute(
+                f"SELECT * FROM user_data WHERE {key} > %s ORDER BY {key} LIMIT %s",
+                (last_key, page_size),
+            )
+        rows = cursor.fetchall()
+        position = cursor.column_names.index(key)
+        cursor.close()
+    return rows, rows[-1][position] if rows else last_key
+
+
+def lazy_paginate(page_size, key="user_id"):
+    """Lazy pagination function
+
+    Walks the table page by page with keyset pagination and stops once
+    a short page shows the table is exhausted.
+    """
+    last_key = None
     while True:
-        users = paginate_users(page_size, offset)
+        users, last_key = seek_users(page_size, last_key, key)
         for user in users:
             yield user
-        offset += page_size
-        if offset >= 1000:  # total of 1000 users
+        if len(users) < page_size:
             break
@@ -1,23 +1,22 @@
 #!/usr/bin/env python3
 
-from seed import connect_db
+from aggregate import summarize
+from pool import connection
 
 def stream_user_ages():
     """Prints average  ages from the database."""
-    with connect_db() as db:
+    with connection() as db:
         cursor = db.cursor()
         cursor.execute("SELECT age FROM user_data;")
         for age in cursor:
             yield age[0]
+        cursor.close()
 
 
 def average_ages():
-    """Prints average ages from the database."""
-    total_age = 0
-    count = 0
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-    if count == 0:
-        return 0
-    return total_age / count
+    """Prints average ages from the database.
+
+    The sum and count are computed by the database; dividing them here
+    gives the same Decimal as adding up stream_user_ages() in Python.
+    """
+    return summarize("age")["mean"]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import math
+from decimal import Decimal
+
+import mysql.connector
+
+from pool import connection
+from query import Query, _identifier, fetch_batches
+
+try:
+    import numpy as np
+except ImportError:  # the chunked reduction falls back to plain Python
+    np = None
+
+
+def summarize(
+    column="age",
+    table="user_data",
+    percentiles=(),
+    bucket_width=None,
+    in_database=True,
+    chunk_size=10000,
+):
+    """Aggregate ``column`` of ``table``
+
+    Returns a dict with count, sum, mean, min, max, the nearest-rank
+    ``percentiles`` (e.g. ``(50, 90, 99)``) and, when ``bucket_width`` is
+    given, a histogram mapping bucket start to row count.
+
+    The aggregates run in SQL when the server accepts them, otherwise
+    over ``fetchmany`` chunks on the client. Both paths sum DECIMAL
+    values exactly, so ``mean`` equals ``sum / count`` computed in Python.
+    """
+    _identifier(column)
+    _identifier(table)
+    if in_database:
+        try:
+            return _summarize_sql(column, table, percentiles, bucket_width)
+        except mysql.connector.Error:
+            pass
+    return _summarize_chunks(column, table, percentiles, bucket_width, chunk_size)
+
+
+def _nearest_rank(percentile, count):
+    """0-based position of the nearest-rank ``percentile`` of ``count`` rows"""
+    if not 0 < percentile <= 100:
+        raise ValueError(f"percentile must be in (0, 100]: {percentile!r}")
+    return max(math.ceil(percentile / 100 * count), 1) - 1
+
+
+def _result(count, total, minimum, maximum, ranks, histogram):
+    return {
+        "count": count,
+        "sum": total,
+        "mean": total / count if count else 0,
+        "min": minimum,
+        "max": maximum,
+        "percentiles": ranks,
+        "histogram": histogram,
+    }
+
+
+def _summarize_sql(column, table, percentiles, bucket_width):
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute(
+            f"SELECT COUNT({column}), SUM({column}), MIN({column}), MAX({column}) "
+            f"FROM {table}"
+        )
+        count, total, minimum, maximum = cursor.fetchone()
+        total = total if total is not None else 0
+
+        ranks = {}
+        for percentile in percentiles:
+            if count:
+                cursor.execute(
+                    f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL "
+                    f"ORDER BY {column} LIMIT 1 OFFSET %s",
+                    (_nearest_rank(percentile, count),),
+                )
+                ranks[percentile] = cursor.fetchone()[0]
+
+        histogram = None
+        if bucket_width is not None:
+            cursor.execute(
+                f"SELECT FLOOR({column} / %s) * %s AS bucket, COUNT(*) "
+                f"FROM {table} WHERE {column} IS NOT NULL "
+                f"GROUP BY bucket ORDER BY bucket",
+                (bucket_width, bucket_width),
+            )
+            histogram = {int(bucket): n for bucket, n in cursor.fetchall()}
+        cursor.close()
+    return _result(count, total, minimum, maximum, ranks, histogram)
+
+
+def _summarize_chunks(column, table, percentiles, bucket_width, chunk_size):
+    count = 0
+    total = 0
+    minimum = maximum = None
+    histogram = {} if bucket_width is not None else None
+    seen = []
+    integral = True
+
+    query = Query(table).select(column).where(f"{column} IS NOT NULL")
+    for rows in fetch_batches(query, chunk_size):
+        values = [row[0] for row in rows]
+        if percentiles:
+            seen.extend(values)
+        if np is not None and all(_integral(v) for v in values):
+            # whole numbers reduce exactly as int64
+            values = np.fromiter((int(v) for v in values), np.int64, len(values))
+            chunk_total = Decimal(int(values.sum()))
+            chunk_min = Decimal(int(values.min()))
+            chunk_max = Decimal(int(values.max()))
+            if histogram is not None:
+                buckets, counts = np.unique(
+                    values // bucket_width * bucket_width, return_counts=True
+                )
+                for bucket, n in zip(buckets.tolist(), counts.tolist()):
+                    histogram[bucket] = histogram.get(bucket, 0) + n
+        else:
+            integral = False
+            chunk_total = sum(values)
+            chunk_min = min(values)
+            chunk_max = max(values)
+            if histogram is not None:
+                for value in values:
+                    bucket = int(math.floor(value / bucket_width) * bucket_width)
+                    histogram[bucket] = histogram.get(bucket, 0) + 1
+        count += len(values)
+        total += chunk_total
+        minimum = chunk_min if minimum is None else min(minimum, chunk_min)
+        maximum = chunk_max if maximum is None else max(maximum, chunk_max)
+
+    ranks = {}
+    if percentiles and count:
+        if np is not None and integral:
+            ordered = np.sort(np.fromiter((int(v) for v in seen), np.int64, count))
+            ranks = {
+                p: Decimal(int(ordered[_nearest_rank(p, count)])) for p in percentiles
+            }
+        else:
+            ordered = sorted(seen)
+            ranks = {p: ordered[_nearest_rank(p, count)] for p in percentiles}
+    if histogram is not None:
+        histogram = dict(sorted(histogram.items()))
+    return _result(count, total, minimum, maximum, ranks, histogram)
+
+
+def _integral(value):
+    return isinstance(value, int) or (
+        isinstance(value, Decimal) and value == value.to_integral_value()
+    )
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+from dotenv import load_dotenv
+
+from query import Query
+
+load_dotenv()
+
+_pool = None
+
+
+async def get_pool():
+    """Return the shared aiomysql pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = await aiomysql.create_pool(
+            host=os.getenv("MYSQL_HOST"),
+            port=int(os.getenv("MYSQL_PORT", "3306")),
+            user=os.getenv("MYSQL_USER"),
+            password=os.getenv("MYSQL_PASSWORD"),
+            db=os.getenv("MYSQL_DATABASE"),
+            minsize=1,
+            maxsize=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+            pool_recycle=float(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", "300")),
+        )
+    return _pool
+
+
+async def close_pool():
+    """Close the shared pool and wait for its connections to go away"""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+@asynccontextmanager
+async def _borrow(pool):
+    """Borrow a connection from ``pool``
+
+    Any pool works that hands out aiomysql connections through
+    ``await pool.acquire()`` and ``await pool.release(conn)``. The
+    aiomysql pool does, since its release() returns a future.
+    """
+    conn = await pool.acquire()
+    try:
+        yield conn
+    finally:
+        await pool.release(conn)
+
+
+async def _produce(pool, statement, params, batch_size, batches):
+    """Read batches through a server-side cursor into ``batches``"""
+    async with _borrow(pool) as conn:
+        finished = False
+        try:
+            cursor = await conn.cursor(aiomysql.SSCursor)
+            await cursor.execute(statement, params)
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                # blocks while the consumer is ``prefetch`` batches behind
+                await batches.put(rows)
+            await cursor.close()
+            finished = True
+            await batches.put(None)
+        except Exception as err:
+            await batches.put(err)
+        finally:
+            if not finished:
+                # drop the rest of the result set rather than draining it
+                conn.close()
+
+
+async def _prefetch(query, batch_size, prefetch, pool):
+    """Yield batches of ``query`` while the next ones are being read"""
+    pool = pool or await get_pool()
+    statement, params = query.sql()
+    batches = asyncio.Queue(maxsize=prefetch)
+    producer = asyncio.create_task(
+        _produce(pool, statement, params, batch_size, batches)
+    )
+    try:
+        while True:
+            item = await batches.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+
+
+async def stream_users(batch_size=100, prefetch=2, pool=None):
+    """Stream all users in the database"""
+    async for rows in _prefetch(Query(), batch_size, prefetch, pool):
+        for row in rows:
+            yield row
+
+
+async def stream_users_in_batches(batch_size, query=None, prefetch=2, pool=None):
+    """Async generator to yield users in batches"""
+    async for rows in _prefetch(query or Query(), batch_size, prefetch, pool):
+        yield rows
+
+
+async def lazy_paginate(page_size, key="user_id", pool=None):
+    """Lazy keyset pagination, see 2-lazy_paginate.lazy_paginate"""
+    pool = pool or await get_pool()
+    query = Query().order_by(key).limit(page_size)
+    last_key = None
+    while True:
+        page = query if last_key is None else query.where(f"{key} > %s", last_key)
+        statement, params = page.sql()
+        async with _borrow(pool) as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(statement, params)
+                users = await cursor.fetchall()
+                position = [c[0] for c in cursor.description].index(key)
+        for user in users:
+            yield user
+        if len(users) < page_size:
+            break
+        last_key = users[-1][position]
+
+
+async def stream_user_ages(batch_size=1000, prefetch=2, pool=None):
+    """Stream the age of every user"""
+    query = Query().select("age")
+    async for rows in _prefetch(query, batch_size, prefetch, pool):
+        for (age,) in rows:
+            yield age
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark columnar exports of user_data against csv.writer.
+
+Reports write time, file size and peak RSS of each export, then the time
+to read every export back (IPC through a memory map). Each format runs
+in a fresh interpreter so that its peak RSS belongs to that export
+alone; ``import_rss_kb`` is the RSS after the imports, before exporting.
+
+    ./bench_export.py [batch_size] [directory]
+"""
+import csv
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import export
+
+
+def timed(action, *args):
+    start = time.perf_counter()
+    result = action(*args)
+    return result, time.perf_counter() - start
+
+
+def read_csv(path):
+    with open(path, newline="") as file:
+        return sum(1 for _ in csv.reader(file)) - 1
+
+
+def read_parquet(path):
+    return export.pq.read_table(path).num_rows
+
+
+def read_ipc(path):
+    return export.read_ipc(path).num_rows
+
+
+FORMATS = {
+    "csv": (export.export_csv, read_csv),
+    "parquet": (export.export_parquet, read_parquet),
+    "arrow": (export.export_ipc, read_ipc),
+}
+
+
+def measure(name, batch_size, directory):
+    """Export and read back one format, printing its row of the report"""
+    write, read = FORMATS[name]
+    path = os.path.join(directory, f"user_data.{name}")
+    # ru_maxrss is reported in kilobytes on Linux
+    import_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rows, write_time = timed(write, path, None, batch_size)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    _, read_time = timed(read, path)
+    size = os.path.getsize(path)
+    print(
+        f"{name}\t{rows}\t{write_time:.2f}\t{read_time:.3f}\t{size}\t"
+        f"{import_rss}\t{peak_rss}"
+    )
+
+
+def main(batch_size, directory):
+    print("format\trows\twrite_s\tread_s\tbytes\timport_rss_kb\tpeak_rss_kb")
+    for name in FORMATS:
+        subprocess.run(
+            [sys.executable, __file__, "--measure", name, str(batch_size), directory],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], int(sys.argv[3]), sys.argv[4])
+    else:
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            sys.argv[2] if len(sys.argv) > 2 else ".",
+        )
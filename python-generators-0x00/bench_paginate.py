@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark per-page latency vs page index for OFFSET and keyset paging.
+
+    ./bench_paginate.py [page_size]
+"""
+import sys
+import time
+
+paginate = __import__("2-lazy_paginate")
+
+
+def offset_pages(page_size):
+    """Yield (page_index, seconds) for LIMIT/OFFSET pagination"""
+    index = 0
+    while True:
+        start = time.perf_counter()
+        rows = list(paginate.paginate_users(page_size, index * page_size))
+        yield index, time.perf_counter() - start
+        if len(rows) < page_size:
+            return
+        index += 1
+
+
+def keyset_pages(page_size):
+    """Yield (page_index, seconds) for keyset pagination"""
+    index = 0
+    last_key = None
+    while True:
+        start = time.perf_counter()
+        rows, last_key = paginate.seek_users(page_size, last_key)
+        yield index, time.perf_counter() - start
+        if len(rows) < page_size:
+            return
+        index += 1
+
+
+def main(page_size):
+    offset = dict(offset_pages(page_size))
+    keyset = dict(keyset_pages(page_size))
+    print("page\toffset_ms\tkeyset_ms")
+    for index in sorted(offset):
+        print(
+            f"{index}\t{offset[index] * 1000:.2f}\t"
+            f"{keyset.get(index, 0) * 1000:.2f}"
+        )
+    print(f"total\t{sum(offset.values()):.3f}s\t{sum(keyset.values()):.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
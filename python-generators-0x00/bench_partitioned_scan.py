@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Benchmark partitioned_scan throughput against the number of workers.
+
+Run it against a large table (see bench_pushdown.py to build one):
+
+    ./bench_partitioned_scan.py [table] [max_workers]
+"""
+import sys
+import time
+
+from partition import partitioned_scan
+from query import Query
+
+
+def main(table, max_workers):
+    print("workers\trows\twall_s\trows_per_s\tspeedup")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        rows = sum(1 for _ in partitioned_scan(workers, query=Query(table)))
+        elapsed = time.perf_counter() - start
+        rate = rows / elapsed
+        baseline = baseline or rate
+        print(f"{workers}\t{rows}\t{elapsed:.2f}\t{rate:.0f}\t{rate / baseline:.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "user_data",
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+    )
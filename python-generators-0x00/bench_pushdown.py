@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark pushdown vs client-side filtering on a scaled-up user_data.
+
+Copies user_data into user_data_bench and doubles it until it holds the
+requested number of rows, then compares bytes sent by the server and wall
+time for "names of users over 25":
+
+  client   SELECT * and filter/project in Python
+  pushdown Query().select("name").where("age > %s", 25)
+
+    ./bench_pushdown.py 10000000 [batch_size]
+"""
+import sys
+import time
+
+from pool import connection
+from query import Query, fetch_batches
+
+TABLE = "user_data_bench"
+
+
+def scale_table(rows):
+    """(Re)build TABLE with at least ``rows`` rows copied from user_data"""
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(f"CREATE TABLE {TABLE} LIKE user_data")
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM user_data")
+        db.commit()
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+        (count,) = cursor.fetchone()
+        while 0 < count < rows:
+            cursor.execute(
+                f"INSERT INTO {TABLE} (user_id, name, email, age) "
+                f"SELECT UUID(), name, CONCAT(UUID(), '@bench'), age "
+                f"FROM {TABLE} LIMIT %s",
+                (rows - count,),
+            )
+            db.commit()
+            count += cursor.rowcount
+        cursor.close()
+    return count
+
+
+def bytes_sent():
+    """Server-wide Bytes_sent counter"""
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Bytes_sent'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+    return value
+
+
+def client_side(batch_size):
+    names = 0
+    for batch in fetch_batches(Query(TABLE), batch_size):
+        for user_id, name, email, age in batch:
+            if age > 25:
+                names += 1
+    return names
+
+
+def pushdown(batch_size):
+    query = Query(TABLE).select("name").where("age > %s", 25)
+    return sum(len(batch) for batch in fetch_batches(query, batch_size))
+
+
+def main(rows, batch_size):
+    print(f"{TABLE}: {scale_table(rows)} rows")
+    print("strategy\trows\tbytes_sent\twall_s")
+    for name, run in (("client", client_side), ("pushdown", pushdown)):
+        before = bytes_sent()
+        start = time.perf_counter()
+        count = run(batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{name}\t{count}\t{bytes_sent() - before}\t{elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5000,
+    )
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Benchmark peak RSS and first-row latency of stream_users vs row count.
+
+Each measurement runs in a fresh interpreter so that peak RSS belongs to
+that run alone.
+
+    ./bench_stream_users.py 1000 10000 100000
+"""
+import resource
+import subprocess
+import sys
+import time
+
+ROW_COUNTS = [1000, 10000, 100000]
+
+
+def measure(mode, limit):
+    """Stream ``limit`` rows and print first-row latency, total time and RSS"""
+    stream_users = __import__("0-stream_users").stream_users
+
+    start = time.perf_counter()
+    rows = stream_users(limit=limit, buffered=(mode == "buffered"))
+    first_row = None
+    count = 0
+    for _ in rows:
+        if first_row is None:
+            first_row = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode}\t{count}\t{(first_row or 0) * 1000:.2f}\t{total:.3f}\t{peak_rss}")
+
+
+def main(row_counts):
+    print("mode\trows\tfirst_row_ms\ttotal_s\tpeak_rss_kb")
+    for limit in row_counts:
+        for mode in ("buffered", "streaming"):
+            subprocess.run(
+                [sys.executable, __file__, "--measure", mode, str(limit)],
+                check=True,
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--measure":
+        measure(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(n) for n in sys.argv[1:]] or ROW_COUNTS)
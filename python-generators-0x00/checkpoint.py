@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Resumable streams of user_data
+
+With the file-backed Checkpoint delivery is at-least-once: after a
+hard kill, rows handled since the last save are delivered again. For
+exactly-once results, keep the consumer's output and the checkpoint in
+one database with SQLiteCheckpoint, so both commit together.
+"""
+import json
+import os
+
+
+class Checkpoint:
+    """The last key and row count of a stream, persisted to a local file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Return ``(last_key, rows)``, or ``(None, 0)`` if nothing is saved"""
+        try:
+            with open(self.path) as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return None, 0
+        return state["last_key"], state["rows"]
+
+    def save(self, last_key, rows):
+        """Atomically replace the saved state"""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump({"last_key": last_key, "rows": rows}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def interrupted(self, last_key, rows):
+        """Keep the progress of a stream that stopped early"""
+        self.save(last_key, rows)
+
+    def clear(self):
+        """Forget the saved state so the next stream starts from scratch"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteCheckpoint:
+    """A checkpoint kept in the consumer's own SQLite database
+
+    save() commits ``conn``, so whatever the consumer wrote on it for the
+    consumed rows becomes durable in the same transaction as the
+    checkpoint. After a crash or kill the uncommitted output is lost
+    along with the rows' acknowledgement, and those rows are delivered
+    again: each row's output is committed exactly once. Create it
+    before writing any output, since it commits ``conn``.
+    """
+
+    def __init__(self, conn, name="user_data"):
+        self.conn = conn
+        self.name = name
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS stream_checkpoints "
+            "(name TEXT PRIMARY KEY, last_key TEXT, rows INTEGER NOT NULL)"
+        )
+        conn.commit()
+
+    def load(self):
+        row = self.conn.execute(
+            "SELECT last_key, rows FROM stream_checkpoints WHERE name = ?",
+            (self.name,),
+        ).fetchone()
+        return tuple(row) if row else (None, 0)
+
+    def save(self, last_key, rows):
+        """Record progress and commit it with the consumer's output"""
+        self.conn.execute(
+            "INSERT INTO stream_checkpoints (name, last_key, rows) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE "
+            "SET last_key = excluded.last_key, rows = excluded.rows",
+            (self.name, last_key, rows),
+        )
+        self.conn.commit()
+
+    def interrupted(self, last_key, rows):
+        """Drop output written since the last save; those rows come again"""
+        self.conn.rollback()
+
+    def clear(self):
+        self.conn.execute("DELETE FROM stream_checkpoints WHERE name = ?", (self.name,))
+        self.conn.commit()
+
+
+def seek_page(page_size, last_key, key="user_id"):
+    """Fetch the next page of user_data as ``(key, row)`` pairs"""
+    from pool import connection
+    from query import Query
+
+    query = Query().order_by(key).limit(page_size)
+    if last_key is not None:
+        query = query.where(f"{key} > %s", last_key)
+    statement, params = query.sql()
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute(statement, params)
+        rows = cursor.fetchall()
+        position = cursor.column_names.index(key)
+        cursor.close()
+    return [(row[position], row) for row in rows]
+
+
+def resumable_stream(checkpoint, page_size=1000, every=100, fetch_page=seek_page):
+    """Stream user_data in user_id order, resuming from ``checkpoint``
+
+    ``checkpoint`` is a Checkpoint path, a Checkpoint, or a
+    SQLiteCheckpoint. A row counts as consumed once the consumer asks
+    for the next one, and progress is saved every ``every`` consumed
+    rows and when the stream ends.
+
+    If the stream stops early (the consumer fails, the database fails,
+    or the generator is closed) the checkpoint's interrupted() runs: a
+    Checkpoint saves the progress so far, and a SQLiteCheckpoint rolls
+    back the output not yet committed. A hard kill skips that step.
+    With a file Checkpoint the rows consumed since the last save are
+    then delivered again (at-least-once; a smaller ``every`` shrinks
+    the window). With a SQLiteCheckpoint their output was never
+    committed, so each row's output lands exactly once.
+
+    ``fetch_page(page_size, last_key)`` returns the ``(key, row)`` pairs
+    that follow ``last_key`` in key order.
+    """
+    if not hasattr(checkpoint, "save"):
+        checkpoint = Checkpoint(checkpoint)
+    last_key, consumed = checkpoint.load()
+    saved = consumed
+    finished = False
+    try:
+        while True:
+            page = fetch_page(page_size, last_key)
+            for key, row in page:
+                yield row
+                last_key, consumed = key, consumed + 1
+                if consumed - saved >= every:
+                    checkpoint.save(last_key, consumed)
+                    saved = consumed
+            if len(page) < page_size:
+                break
+        if consumed != saved:
+            checkpoint.save(last_key, consumed)
+        finished = True
+    finally:
+        if not finished:
+            checkpoint.interrupted(last_key, consumed)
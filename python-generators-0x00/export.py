@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for the columnar formats
+    pa = None
+
+
+def user_data_schema():
+    """Arrow schema matching seed.create_table's user_data"""
+    return pa.schema(
+        [
+            ("user_id", pa.string()),
+            ("name", pa.string()),
+            ("email", pa.string()),
+            ("age", pa.decimal128(10, 0)),
+        ]
+    )
+
+
+def _source(batches, batch_size):
+    if batches is not None:
+        return batches
+    from query import Query, fetch_batches
+
+    return fetch_batches(Query(), batch_size)
+
+
+def record_batches(batches, schema):
+    """Turn batches of row tuples into Arrow record batches, one at a time"""
+    for rows in batches:
+        arrays = [
+            pa.array(column, type=field.type)
+            for column, field in zip(zip(*rows), schema)
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("columnar export needs pyarrow: pip install pyarrow")
+
+
+def export_parquet(path, batches=None, batch_size=10000, schema=None):
+    """Write user_data to a Parquet file, one row group per batch
+
+    ``batches`` defaults to streaming the whole table ``batch_size`` rows
+    at a time; only one batch is held in memory. Returns the row count.
+    """
+    _require_pyarrow()
+    schema = schema or user_data_schema()
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in record_batches(_source(batches, batch_size), schema):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def export_ipc(path, batches=None, batch_size=10000, schema=None):
+    """Write user_data to an Arrow IPC file, see export_parquet"""
+    _require_pyarrow()
+    schema = schema or user_data_schema()
+    rows = 0
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in record_batches(_source(batches, batch_size), schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    return rows
+
+
+def read_ipc(path):
+    """Memory-map an Arrow IPC export and return it as a Table
+
+    The table's buffers point straight into the mapped file, so nothing
+    is copied or parsed until a column is actually touched.
+    """
+    _require_pyarrow()
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def export_csv(path, batches=None, batch_size=10000):
+    """Write user_data to a CSV file with csv.writer"""
+    rows = 0
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["user_id", "name", "email", "age"])
+        for batch in _source(batches, batch_size):
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
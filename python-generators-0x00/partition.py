@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import multiprocessing
+import queue
+
+from query import Query
+
+HEX_DIGITS = "0123456789abcdef"
+
+_DONE = "done"
+_ERROR = "error"
+
+
+def prefix_ranges(partitions):
+    """Split the UUID key space into ``partitions`` ranges of user_id
+
+    Each range is a ``(condition, params)`` pair that seeks on the
+    primary key, so a worker only reads its own slice of the index.
+    """
+    # boundaries on the first two hex digits of the UUID
+    steps = len(HEX_DIGITS) ** 2
+    partitions = max(1, min(partitions, steps))
+    bounds = [
+        HEX_DIGITS[i // 16] + HEX_DIGITS[i % 16]
+        for i in (steps * n // partitions for n in range(1, partitions))
+    ]
+    ranges = []
+    for low, high in zip([None] + bounds, bounds + [None]):
+        if low is None and high is None:
+            ranges.append(("1 = 1", ()))
+        elif low is None:
+            ranges.append(("user_id < %s", (high,)))
+        elif high is None:
+            ranges.append(("user_id >= %s", (low,)))
+        else:
+            ranges.append(("user_id >= %s AND user_id < %s", (low, high)))
+    return ranges
+
+
+def hash_ranges(partitions):
+    """Split user_data into ``partitions`` CRC32 buckets of user_id
+
+    Buckets are evenly sized whatever the key distribution, but each one
+    scans the whole table.
+    """
+    return [
+        ("MOD(CRC32(user_id), %s) = %s", (partitions, bucket))
+        for bucket in range(partitions)
+    ]
+
+
+def _scan_worker(query, tasks, results, batch_size):
+    """Stream every range taken from ``tasks`` onto ``results``"""
+    from pool import ConnectionPool
+
+    # a fresh pool per process; connections must not cross a fork
+    pool = ConnectionPool(size=1)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            condition, params = task
+            statement, params = query.where(condition, *params).sql()
+            with pool.connection() as db:
+                cursor = db.cursor()
+                cursor.execute(statement, params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    results.put(rows)
+                cursor.close()
+        results.put(_DONE)
+    except Exception as err:
+        results.put((_ERROR, repr(err)))
+    finally:
+        pool.close()
+
+
+def partitioned_scan(
+    workers=4, partitions=None, strategy="prefix", batch_size=1000, query=None
+):
+    """Scan user_data in parallel and yield its rows as one stream
+
+    The table is split into ``partitions`` key ranges (``workers`` * 4 by
+    default) using ``strategy`` ("prefix" or "hash"). ``workers``
+    processes each stream ranges over their own connection into a
+    bounded queue, so a slow consumer throttles the workers instead of
+    letting batches pile up in memory. Row order is not preserved.
+    """
+    query = query or Query()
+    split = {"prefix": prefix_ranges, "hash": hash_ranges}[strategy]
+    ranges = split(partitions or workers * 4)
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue(maxsize=workers * 2)
+    for task in ranges:
+        tasks.put(task)
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [
+        multiprocessing.Process(
+            target=_scan_worker,
+            args=(query, tasks, results, batch_size),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    running = workers
+    try:
+        while running:
+            try:
+                item = results.get(timeout=1)
+            except queue.Empty:
+                if any(p.is_alive() for p in processes):
+                    continue
+                # workers may have put their last items and exited since
+                # the timeout; fail only once nothing is left to read
+                try:
+                    item = results.get(timeout=0.1)
+                except queue.Empty:
+                    raise RuntimeError(
+                        "scan workers exited without finishing"
+                    ) from None
+            if item == _DONE:
+                running -= 1
+            elif isinstance(item, tuple) and item[:1] == (_ERROR,):
+                raise RuntimeError(f"scan worker failed: {item[1]}")
+            else:
+                yield from item
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from mysql.connector.errors import PoolError
+
+from seed import connect_db
+
+
+class ConnectionPool:
+    """A small pool of reusable connections built on seed.connect_db"""
+
+    def __init__(self, size=5, connect=connect_db, idle_timeout=300, timeout=30):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._connect = connect
+        # most recently returned first, so cold connections age out
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Check out a healthy connection, opening one if none is idle"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"no connection available within {self.timeout}s")
+        try:
+            while True:
+                try:
+                    connection, returned_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - returned_at > self.idle_timeout:
+                    self._discard(connection)
+                elif connection.is_connected():
+                    return connection
+                else:
+                    self._discard(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        """Return a connection to the pool, or close it if ``discard``"""
+        try:
+            if discard:
+                self._discard(connection)
+            else:
+                try:
+                    connection.rollback()
+                    self._idle.put((connection, time.monotonic()))
+                except Exception:
+                    self._discard(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, discard=not connection.is_connected())
+            raise
+        else:
+            self.release(connection)
+
+    def evict_idle(self):
+        """Close every idle connection older than ``idle_timeout``"""
+        keep = []
+        while True:
+            try:
+                connection, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - returned_at > self.idle_timeout:
+                self._discard(connection)
+            else:
+                keep.append((connection, returned_at))
+        for item in reversed(keep):
+            self._idle.put(item)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared pool, creating it on first use
+
+    Its size and idle timeout come from MYSQL_POOL_SIZE and
+    MYSQL_POOL_IDLE_TIMEOUT.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+                idle_timeout=float(os.getenv("MYSQL_POOL_IDLE_TIMEOUT", "300")),
+            )
+        return _pool
+
+
+def configure(**options):
+    """Replace the shared pool with one built from ``options``"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(**options)
+        return _pool
+
+
+def connection():
+    """Borrow a connection from the shared pool"""
+    return get_pool().connection()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import re
+
+from pool import connection
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name):
+    """Reject anything that is not a plain column or table name"""
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"invalid identifier: {name!r}")
+    return name
+
+
+class Query:
+    """A composable SELECT that pushes projection, filters and limits to SQL
+
+    Every method returns a new Query, so partial queries can be shared:
+
+    >>> adults = Query().where("age > %s", 25)
+    >>> adults.select("name", "email").limit(10).sql()
+    ('SELECT name, email FROM user_data WHERE age > %s LIMIT %s', (25, 10))
+    """
+
+    def __init__(self, table="user_data"):
+        self.table = _identifier(table)
+        self.columns = ()
+        self.conditions = ()
+        self.params = ()
+        self.order = ()
+        self.row_limit = None
+
+    def _copy(self, **changes):
+        query = Query.__new__(Query)
+        query.__dict__.update(self.__dict__, **changes)
+        return query
+
+    def select(self, *columns):
+        """Only fetch ``columns`` instead of ``*``"""
+        return self._copy(columns=tuple(_identifier(c) for c in columns))
+
+    def where(self, condition, *params):
+        """AND a ``%s``-parametrised condition onto the query"""
+        return self._copy(
+            conditions=self.conditions + (condition,),
+            params=self.params + params,
+        )
+
+    def order_by(self, *columns):
+        """Sort the result on ``columns``"""
+        return self._copy(order=tuple(_identifier(c) for c in columns))
+
+    def limit(self, count):
+        """Stop after ``count`` rows"""
+        return self._copy(row_limit=int(count))
+
+    def sql(self):
+        """Return the statement and its parameters"""
+        statement = f"SELECT {', '.join(self.columns) or '*'} FROM {self.table}"
+        params = self.params
+        if self.conditions:
+            statement += " WHERE " + " AND ".join(
+                f"({c})" if len(self.conditions) > 1 else c for c in self.conditions
+            )
+        if self.order:
+            statement += " ORDER BY " + ", ".join(self.order)
+        if self.row_limit is not None:
+            statement += " LIMIT %s"
+            params += (self.row_limit,)
+        return statement, params
+
+
+def fetch_batches(query, batch_size):
+    """Run ``query`` on a pooled connection and yield lists of rows"""
+    statement, params = query.sql()
+    with connection() as db:
+        cursor = db.cursor()
+        cursor.execute(statement, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
@@ -4,7 +4,9 @@ import mysql.connector
 from mysql.connector import errorcode
 from dotenv import load_dotenv
 import csv
+import time
 import uuid
+from itertools import islice
 
 # Load environment variables
 load_dotenv()
@@ -32,7 +34,7 @@ def create_database(connection):
         cursor.close()
 
 
-def connect_to_prodev():
+def connect_to_prodev(allow_local_infile=False):
     """connect to ALX_prodev database"""
     return mysql.connector.connect(
         host=os.getenv("MYSQL_HOST"),
@@ -40,6 +42,7 @@ def connect_to_prodev():
         password=os.getenv("MYSQL_PASSWORD"),
         database="ALX_prodev",
         port=int(os.getenv("MYSQL_PORT")),
+        allow_local_infile=allow_local_infile,
     )
 
 
@@ -64,31 +67,103 @@ def create_table(connection):
         cursor.close()
 
 
-def insert_data(connection, data):
-    """insert data into users table"""
+def insert_data(connection, data, chunk_size=1000, local_infile=False):
+    """insert data into users table
+
+    ``data`` is either a CSV file path or an iterable of
+    (user_id, name, email, age) rows. Rows are sent as multi-row INSERTs
+    of ``chunk_size`` rows with one commit per chunk, so neither memory
+    nor lock time grows with the size of the seed. With ``local_infile``
+    a CSV path is handed to LOAD DATA LOCAL INFILE instead.
+    """
+    if isinstance(data, (str, os.PathLike)):
+        if local_infile:
+            return load_data_infile(connection, data)
+        chunks = read_csv_chunks(data, chunk_size)
+    else:
+        rows = iter(data)
+        chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+
     cursor = connection.cursor()
-    insert_query = """
-    INSERT INTO user_data (user_id, name, email, age)
-    VALUES (%s, %s, %s, %s)
+    inserted = 0
+    start = last_report = time.perf_counter()
+    try:
+        for chunk in chunks:
+            placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+            cursor.execute(
+                "INSERT INTO user_data (user_id, name, email, age) VALUES "
+                + placeholders,
+                [value for row in chunk for value in row],
+            )
+            connection.commit()
+            inserted += len(chunk)
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                rate = inserted / (now - start)
+                print(f"{inserted} records inserted ({rate:.0f} rows/sec)")
+                last_report = now
+        elapsed = time.perf_counter() - start
+        rate = inserted / elapsed if elapsed else 0
+        print(f"{inserted} records inserted successfully ({rate:.0f} rows/sec)")
+    except mysql.connector.Error as err:
+        connection.rollback()
+        print(f"Failed inserting data after {inserted} records:", err)
+    finally:
+        cursor.close()
+    return inserted
+
+
+def load_data_infile(connection, file_path):
+    """bulk load a CSV file with LOAD DATA LOCAL INFILE
+
+    The connection must be opened with ``allow_local_infile=True`` and the
+    server must have ``local_infile`` enabled. user_id is generated by the
+    server.
     """
+    cursor = connection.cursor()
+    start = time.perf_counter()
     try:
-        cursor.executemany(insert_query, data)
+        cursor.execute(
+            """
+            LOAD DATA LOCAL INFILE %s INTO TABLE user_data
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 LINES
+            (name, email, age)
+            SET user_id = UUID()
+            """,
+            (os.path.abspath(file_path),),
+        )
         connection.commit()
-        print(f"{cursor.rowcount} records inserted successfully")
+        elapsed = time.perf_counter() - start
+        rate = cursor.rowcount / elapsed if elapsed else 0
+        print(f"{cursor.rowcount} records loaded successfully ({rate:.0f} rows/sec)")
+        return cursor.rowcount
     except mysql.connector.Error as err:
-        print("Failed inserting data:", err)
+        connection.rollback()
+        print("Failed loading data:", err)
+        return 0
     finally:
         cursor.close()
 
 
-def load_csv_data(file_path):
-    """load data from CSV file"""
-    data = []
+def read_csv_chunks(file_path, chunk_size=1000):
+    """yield lists of up to ``chunk_size`` rows read from a CSV file"""
     with open(file_path, newline="") as file:
         reader = csv.DictReader(file)
-        for row in reader:
-            data.append((str(uuid.uuid4()), row["name"], row["email"], row["age"]))
-    return data
+        while True:
+            chunk = [
+                (str(uuid.uuid4()), row["name"], row["email"], row["age"])
+                for row in islice(reader, chunk_size)
+            ]
+            if not chunk:
+                return
+            yield chunk
+
+
+def load_csv_data(file_path):
+    """load data from CSV file"""
+    return [row for chunk in read_csv_chunks(file_path) for row in chunk]
 
 
 if __name__ == "__main__":
@@ -101,9 +176,8 @@ if __name__ == "__main__":
     conn = connect_to_prodev()
     create_table(conn)
 
-    # Step 3: Load CSV and insert data
-    csv_data = load_csv_data("../data/user_data.csv")
-    insert_data(conn, csv_data)
+    # Step 3: Stream the CSV into the table
+    insert_data(conn, "../data/user_data.csv")
 
     conn.close()
     print("Seeding completed")
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+  Unittests for checkpoint module.
+"""
+import bisect
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+import uuid
+
+from checkpoint import Checkpoint, SQLiteCheckpoint, resumable_stream
+
+ROWS = sorted(
+    (str(uuid.UUID(int=random.Random(n).getrandbits(128))), f"user {n}", n % 100)
+    for n in range(1000)
+)
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# consumer that records every row it gets and dies without unwinding
+KILLED_CONSUMER = """
+import os, sys
+from checkpoint import resumable_stream
+from test_checkpoint import fetch_page
+path, log, page_size, every, crash = sys.argv[1:]
+with open(log, "a") as log:
+    stream = resumable_stream(path, int(page_size), int(every), fetch_page)
+    for handled, row in enumerate(stream):
+        log.write(row[0] + "\\n")
+        log.flush()
+        if handled == int(crash):
+            os._exit(1)
+"""
+
+# consumer that writes its output and checkpoint to one SQLite database
+KILLED_SQLITE_CONSUMER = """
+import os, sqlite3, sys
+from checkpoint import SQLiteCheckpoint, resumable_stream
+from test_checkpoint import fetch_page
+database, page_size, every, crash = sys.argv[1:]
+conn = sqlite3.connect(database)
+checkpoint = SQLiteCheckpoint(conn)
+stream = resumable_stream(checkpoint, int(page_size), int(every), fetch_page)
+for handled, row in enumerate(stream):
+    conn.execute("INSERT INTO output (key) VALUES (?)", (row[0],))
+    if handled == int(crash):
+        os._exit(1)
+"""
+
+
+class Crash(Exception):
+    """Simulated failure of the consumer or the database."""
+
+
+def fetch_page(page_size, last_key, fail_at=None):
+    """Serve ROWS as keyset pages, optionally failing past a key index."""
+    start = 0
+    if last_key is not None:
+        start = bisect.bisect_right([row[0] for row in ROWS], last_key)
+    page = ROWS[start:start + page_size]
+    if fail_at is not None and start <= fail_at < start + page_size:
+        raise Crash("database went away")
+    return [(row[0], row) for row in page]
+
+
+class TestResumableStream(unittest.TestCase):
+    """TestResumableStream class to test resumable_stream."""
+
+    def setUp(self):
+        """Point every test at a fresh checkpoint file."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.path = os.path.join(self.directory, "export.checkpoint")
+
+    def test_uninterrupted(self):
+        """Test that a clean run delivers every row once, in key order."""
+        rows = list(resumable_stream(self.path, 64, 10, fetch_page))
+        self.assertEqual(rows, ROWS)
+        self.assertEqual(Checkpoint(self.path).load(), (ROWS[-1][0], len(ROWS)))
+
+    def test_resume_after_completion(self):
+        """Test that a finished export has nothing left to deliver."""
+        list(resumable_stream(self.path, 64, 10, fetch_page))
+        self.assertEqual(list(resumable_stream(self.path, 64, 10, fetch_page)), [])
+
+    def test_crash_injection(self):
+        """Test that crashes followed by close() lose or repeat nothing."""
+        chaos = random.Random(1234)
+        delivered = []
+        for attempt in range(200):
+            page_size = chaos.randint(1, 97)
+            every = chaos.randint(1, 50)
+            consumer_crash = chaos.randint(0, 150)
+            database_crash = chaos.choice([None, chaos.randrange(len(ROWS))])
+            stream = resumable_stream(
+                self.path,
+                page_size,
+                every,
+                lambda size, key: fetch_page(size, key, database_crash),
+            )
+            try:
+                for handled, row in enumerate(stream):
+                    if handled == consumer_crash:
+                        raise Crash("consumer died")
+                    delivered.append(row)
+            except Crash:
+                stream.close()
+                continue
+            break
+        else:
+            self.fail("the export never completed")
+        self.assertEqual(delivered, ROWS)
+        self.assertEqual(Checkpoint(self.path).load()[1], len(ROWS))
+
+    def test_hard_kill(self):
+        """Test that a killed consumer resumes at the checkpoint, loses
+        nothing, and has at most ``every`` delivered rows left unsaved."""
+        chaos = random.Random(4321)
+        keys = [row[0] for row in ROWS]
+        log = os.path.join(self.directory, "delivered.log")
+        checkpoint = Checkpoint(self.path)
+        position = 0
+        for attempt in range(200):
+            every = chaos.randint(1, 50)
+            saved = checkpoint.load()[1]
+            seen = 0
+            if os.path.exists(log):
+                with open(log) as file:
+                    seen = len(file.read().split())
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    KILLED_CONSUMER,
+                    self.path,
+                    log,
+                    str(chaos.randint(1, 97)),
+                    str(every),
+                    str(chaos.randint(0, 150)),
+                ],
+                cwd=HERE,
+                check=False,
+            )
+            with open(log) as file:
+                run = file.read().split()[seen:]
+            self.assertLessEqual(saved, position)
+            self.assertEqual(run, keys[saved:saved + len(run)])
+            position = max(position, saved + len(run))
+            if result.returncode == 0:
+                break
+            # the finally never ran; only the periodic saves survived
+            if checkpoint.load()[1] != saved:
+                self.assertLessEqual(position - checkpoint.load()[1], every)
+        else:
+            self.fail("the export never completed")
+        self.assertEqual(position, len(keys))
+        self.assertEqual(checkpoint.load()[1], len(ROWS))
+
+    def output_database(self):
+        """Create the consumer's output table and return its path."""
+        database = os.path.join(self.directory, "output.db")
+        conn = sqlite3.connect(database)
+        conn.execute("CREATE TABLE output (key TEXT)")
+        conn.commit()
+        conn.close()
+        return database
+
+    def output(self, database):
+        conn = sqlite3.connect(database)
+        try:
+            return [key for key, in conn.execute("SELECT key FROM output")]
+        finally:
+            conn.close()
+
+    def test_sqlite_checkpoint_hard_kill(self):
+        """Test that output committed with the checkpoint survives kills
+        exactly once."""
+        chaos = random.Random(8765)
+        database = self.output_database()
+        for attempt in range(200):
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    KILLED_SQLITE_CONSUMER,
+                    database,
+                    str(chaos.randint(1, 97)),
+                    str(chaos.randint(1, 50)),
+                    str(chaos.randint(0, 150)),
+                ],
+                cwd=HERE,
+                check=False,
+            )
+            if result.returncode == 0:
+                break
+        else:
+            self.fail("the export never completed")
+        self.assertGreater(attempt, 0)
+        self.assertEqual(self.output(database), [row[0] for row in ROWS])
+
+    def test_sqlite_checkpoint_consumer_crash(self):
+        """Test that output of the row in hand is rolled back on close."""
+        database = self.output_database()
+        conn = sqlite3.connect(database)
+        self.addCleanup(conn.close)
+        checkpoint = SQLiteCheckpoint(conn)
+        stream = resumable_stream(checkpoint, 64, 10, fetch_page)
+        try:
+            for handled, row in enumerate(stream):
+                conn.execute("INSERT INTO output (key) VALUES (?)", (row[0],))
+                if handled == 25:
+                    raise Crash("consumer died")
+        except Crash:
+            stream.close()
+        committed = self.output(database)
+        self.assertEqual(len(committed), checkpoint.load()[1])
+        for row in resumable_stream(checkpoint, 64, 10, fetch_page):
+            conn.execute("INSERT INTO output (key) VALUES (?)", (row[0],))
+        self.assertEqual(self.output(database), [row[0] for row in ROWS])
+
+
+if __name__ == "__main__":
+    unittest.main()